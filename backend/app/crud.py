@@ -1,7 +1,13 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, select, literal, and_, case, update
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime, timedelta, timezone
 from . import models, schemas
+from .utils.content_hash import flashcard_content_hash
+
+def dialect_insert(db: Session):
+    """INSERT hỗ trợ ON CONFLICT theo dialect đang dùng (Postgres / SQLite)"""
+    return postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
 
 # ==================== USER CRUD ====================
 
@@ -9,6 +15,13 @@ def get_all_users(db: Session):
     """Lấy tất cả users"""
     return db.query(models.User).all()
 
+def get_deck_counts_by_user(db: Session, user_ids=None):
+    """{user_id: số deck} bằng 1 query GROUP BY (thay cho len(user.decks) từng user → N+1)"""
+    query = db.query(models.Deck.user_id, func.count(models.Deck.id)).group_by(models.Deck.user_id)
+    if user_ids is not None:
+        query = query.filter(models.Deck.user_id.in_(list(user_ids)))
+    return dict(query.all())
+
 def get_user(db: Session, user_id: int):
     """Lấy user theo ID"""
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -100,14 +113,64 @@ def get_decks_by_user(db: Session, user_id: int):
     """Lấy tất cả decks của user"""
     return db.query(models.Deck).filter(models.Deck.user_id == user_id).all()
 
+def deck_rows_query():
+    """SELECT cột deck + flashcard_count (GROUP BY) - dùng chung cho crud sync / async"""
+    return select(
+        models.Deck.id, models.Deck.name, models.Deck.language, models.Deck.user_id,
+        models.Deck.created_at, models.Deck.updated_at,
+        func.count(models.Flashcard.id).label("flashcard_count"),
+    ).outerjoin(models.Flashcard, models.Flashcard.deck_id == models.Deck.id).group_by(
+        models.Deck.id
+    ).order_by(models.Deck.id)
+
+def get_deck_rows_by_user(db: Session, user_id: int):
+    """
+    Decks của user dạng dict thuần (kèm flashcard_count) cho response nhanh:
+    1 query GROUP BY thay vì load toàn bộ deck.flashcards, không qua identity map
+    """
+    stmt = deck_rows_query().where(models.Deck.user_id == user_id)
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
 def get_deck(db: Session, deck_id: int):
     """Lấy deck theo ID"""
     return db.query(models.Deck).filter(models.Deck.id == deck_id).first()
 
+def count_flashcards_in_deck(db: Session, deck_id: int) -> int:
+    """Đếm flashcard bằng COUNT, không load cả deck.flashcards"""
+    return db.query(func.count(models.Flashcard.id)).filter(models.Flashcard.deck_id == deck_id).scalar()
+
+def get_deck_version(db: Session, deck_id: int):
+    """Version hiện tại của deck (None nếu không có) - chỉ đọc bảng decks"""
+    return db.query(models.Deck.version).filter(models.Deck.id == deck_id).scalar()
+
+def get_user_decks_version(db: Session, user_id: int):
+    """Version danh sách deck của user (None nếu không có) - chỉ đọc bảng users"""
+    return db.query(models.User.decks_version).filter(models.User.id == user_id).scalar()
+
+def bump_user_decks_version(db: Session, user_id: int):
+    """Đánh dấu danh sách deck của user đã đổi (không commit - đi chung transaction ghi)"""
+    db.execute(
+        update(models.User).where(models.User.id == user_id)
+        .values(decks_version=models.User.decks_version + 1)
+    )
+
+def bump_deck_version(db: Session, deck_id: int):
+    """Đánh dấu deck (và danh sách deck của chủ deck - flashcard_count) đã đổi, không commit"""
+    db.execute(
+        update(models.Deck).where(models.Deck.id == deck_id)
+        .values(version=models.Deck.version + 1)
+    )
+    owner_id = select(models.Deck.user_id).where(models.Deck.id == deck_id).scalar_subquery()
+    db.execute(
+        update(models.User).where(models.User.id == owner_id)
+        .values(decks_version=models.User.decks_version + 1)
+    )
+
 def create_deck(db: Session, deck: schemas.DeckCreate):
     """Tạo deck mới"""
     db_deck = models.Deck(**deck.dict())
     db.add(db_deck)
+    bump_user_decks_version(db, db_deck.user_id)
     db.commit()
     db.refresh(db_deck)
     return db_deck
@@ -117,6 +180,7 @@ def update_deck(db: Session, deck_id: int, deck: schemas.DeckUpdate):
     db_deck = get_deck(db, deck_id)
     if db_deck:
         db_deck.name = deck.name
+        bump_deck_version(db, deck_id)
         db.commit()
         db.refresh(db_deck)
     return db_deck
@@ -125,6 +189,10 @@ def delete_deck(db: Session, deck_id: int):
     """Xóa deck"""
     db_deck = get_deck(db, deck_id)
     if db_deck:
+        db.add(models.SyncTombstone(
+            user_id=db_deck.user_id, entity="deck", entity_id=db_deck.id, deck_id=db_deck.id
+        ))
+        bump_user_decks_version(db, db_deck.user_id)
         db.delete(db_deck)
         db.commit()
         return True
@@ -136,20 +204,70 @@ def get_flashcards_by_deck(db: Session, deck_id: int):
     """Lấy tất cả flashcards của deck"""
     return db.query(models.Flashcard).filter(models.Flashcard.deck_id == deck_id).all()
 
+def flashcard_rows_query(deck_id: int):
+    """SELECT cột flashcard của deck - dùng chung cho crud sync / async"""
+    return select(
+        models.Flashcard.id, models.Flashcard.deck_id, models.Flashcard.vietnamese,
+        models.Flashcard.pronunciation, models.Flashcard.target_language,
+        models.Flashcard.created_at, models.Flashcard.updated_at,
+    ).where(models.Flashcard.deck_id == deck_id).order_by(models.Flashcard.id)
+
+def get_flashcard_rows_by_deck(db: Session, deck_id: int):
+    """Flashcards của deck dạng dict thuần (query cột, không tạo ORM object) cho response nhanh"""
+    return [dict(row) for row in db.execute(flashcard_rows_query(deck_id)).mappings()]
+
 def delete_flashcards_by_deck(db: Session, deck_id: int):
     """Xóa tất cả flashcard của một deck, trả về số lượng đã xóa"""
+    # Bulk delete bỏ qua ORM cascade → xóa ví dụ đã lưu trước (SQLite không bật FK)
+    card_ids = db.query(models.Flashcard.id).filter(models.Flashcard.deck_id == deck_id)
+    db.query(models.FlashcardExample).filter(
+        models.FlashcardExample.flashcard_id.in_(card_ids.scalar_subquery())
+    ).delete(synchronize_session=False)
+    db.query(models.ReviewState).filter(models.ReviewState.deck_id == deck_id).delete(synchronize_session=False)
+    db.query(models.ReviewEvent).filter(models.ReviewEvent.deck_id == deck_id).delete(synchronize_session=False)
+    # Tombstone cho delta sync (INSERT ... SELECT, 1 câu lệnh)
+    db.execute(insert(models.SyncTombstone).from_select(
+        ["user_id", "entity", "entity_id", "deck_id", "deleted_at"],
+        select(
+            models.Deck.user_id, literal("flashcard"), models.Flashcard.id, models.Flashcard.deck_id,
+            literal(datetime.now(timezone.utc), models.SyncTombstone.deleted_at.type)
+        ).join(models.Deck, models.Deck.id == models.Flashcard.deck_id).where(models.Flashcard.deck_id == deck_id)
+    ))
     count = db.query(models.Flashcard).filter(models.Flashcard.deck_id == deck_id).delete()
+    bump_deck_version(db, deck_id)
     db.commit()
     return count
 
+def get_known_translations(db: Session, vietnamese: str, language: str, limit: int = 10):
+    """
+    (target_language, pronunciation) đã có trong flashcard của mọi user cho nghĩa tiếng Việt này -
+    dùng khi Google Translate không gọi được
+    """
+    return (
+        db.query(models.Flashcard.target_language, func.min(models.Flashcard.pronunciation))
+        .join(models.Deck, models.Deck.id == models.Flashcard.deck_id)
+        .filter(func.lower(models.Flashcard.vietnamese) == vietnamese.lower())
+        .filter(models.Deck.language == language)
+        .group_by(models.Flashcard.target_language)
+        .order_by(func.count(models.Flashcard.id).desc())
+        .limit(limit)
+        .all()
+    )
+
 def get_flashcard(db: Session, flashcard_id: int):
     """Lấy flashcard theo ID"""
     return db.query(models.Flashcard).filter(models.Flashcard.id == flashcard_id).first()
 
 def create_flashcard(db: Session, flashcard: schemas.FlashcardCreate):
     """Tạo flashcard mới"""
-    db_flashcard = models.Flashcard(**flashcard.dict())
+    db_flashcard = models.Flashcard(
+        **flashcard.dict(),
+        content_hash=flashcard_content_hash(flashcard.vietnamese, flashcard.target_language)
+    )
     db.add(db_flashcard)
+    db.flush()
+    init_review_states(db, flashcard.deck_id, [db_flashcard.id])
+    bump_deck_version(db, flashcard.deck_id)
     db.commit()
     db.refresh(db_flashcard)
     return db_flashcard
@@ -162,16 +280,59 @@ def create_flashcards_bulk(db: Session, deck_id: int, flashcards_data: list):
             deck_id=deck_id,
             vietnamese=fc_data['vietnamese'],
             pronunciation=fc_data['pronunciation'],
-            target_language=fc_data['target_language']
+            target_language=fc_data['target_language'],
+            content_hash=fc_data.get('content_hash') or flashcard_content_hash(
+                fc_data['vietnamese'], fc_data['target_language']
+            )
         )
         db.add(db_flashcard)
         db_flashcards.append(db_flashcard)
     
+    db.flush()
+    init_review_states(db, deck_id, [fc.id for fc in db_flashcards])
+    bump_deck_version(db, deck_id)
     db.commit()
-    for fc in db_flashcards:
-        db.refresh(fc)
+    # Không refresh từng thẻ (N câu SELECT) - thuộc tính tự load lại khi được truy cập
     return db_flashcards
 
+def get_flashcard_ids_by_content_hash(db: Session, deck_id: int, hashes, chunk_size: int = 5000):
+    """
+    Map content_hash -> flashcard_id cho các hash ĐÃ có trong deck.
+    Tra theo index (deck_id, content_hash), chia chunk để không vượt giới hạn tham số SQL
+    """
+    hashes = list(hashes)
+    found = {}
+    for i in range(0, len(hashes), chunk_size):
+        rows = db.query(models.Flashcard.content_hash, models.Flashcard.id).filter(
+            models.Flashcard.deck_id == deck_id,
+            models.Flashcard.content_hash.in_(hashes[i:i + chunk_size])
+        ).all()
+        for content_hash, fc_id in rows:
+            found.setdefault(content_hash, fc_id)
+    return found
+
+def merge_flashcard_pronunciations(db: Session, deck_id: int, pronunciations: dict, chunk_size: int = 500) -> int:
+    """
+    Ghi pronunciation mới {flashcard_id: giá trị} cho các thẻ của deck, CHỈ thẻ có giá trị khác
+    (1 UPDATE ... SET = CASE id ... mỗi chunk). Trả về số thẻ thực sự đổi (rowcount) - chưa commit
+    """
+    ids = list(pronunciations)
+    now = datetime.now(timezone.utc)
+    changed = 0
+    for i in range(0, len(ids), chunk_size):
+        chunk = {fc_id: pronunciations[fc_id] for fc_id in ids[i:i + chunk_size]}
+        new_value = case(chunk, value=models.Flashcard.id)
+        result = db.execute(
+            update(models.Flashcard).where(
+                models.Flashcard.deck_id == deck_id,
+                models.Flashcard.id.in_(list(chunk)),
+                models.Flashcard.pronunciation.is_distinct_from(new_value),
+            ).values(pronunciation=new_value, updated_at=now),
+            execution_options={"synchronize_session": False},
+        )
+        changed += result.rowcount
+    return changed
+
 def update_flashcard(db: Session, flashcard_id: int, flashcard: schemas.FlashcardUpdate):
     """Cập nhật flashcard"""
     db_flashcard = get_flashcard(db, flashcard_id)
@@ -179,6 +340,10 @@ def update_flashcard(db: Session, flashcard_id: int, flashcard: schemas.Flashcar
         db_flashcard.vietnamese = flashcard.vietnamese
         db_flashcard.pronunciation = flashcard.pronunciation
         db_flashcard.target_language = flashcard.target_language
+        db_flashcard.content_hash = flashcard_content_hash(flashcard.vietnamese, flashcard.target_language)
+        # Nội dung đổi → ví dụ đã lưu không còn đúng
+        db_flashcard.generated_examples.clear()
+        bump_deck_version(db, db_flashcard.deck_id)
         db.commit()
         db.refresh(db_flashcard)
     return db_flashcard
@@ -187,6 +352,11 @@ def delete_flashcard(db: Session, flashcard_id: int):
     """Xóa flashcard"""
     db_flashcard = get_flashcard(db, flashcard_id)
     if db_flashcard:
+        db.add(models.SyncTombstone(
+            user_id=db_flashcard.deck.user_id, entity="flashcard",
+            entity_id=db_flashcard.id, deck_id=db_flashcard.deck_id
+        ))
+        bump_deck_version(db, db_flashcard.deck_id)
         db.delete(db_flashcard)
         db.commit()
         return True
@@ -194,4 +364,302 @@ def delete_flashcard(db: Session, flashcard_id: int):
 
 def get_flashcards_by_deck(db: Session, deck_id: int):
     """Lấy tất cả flashcards của deck"""
-    return db.query(models.Flashcard).filter(models.Flashcard.deck_id == deck_id).all()
\ No newline at end of file
+    return db.query(models.Flashcard).filter(models.Flashcard.deck_id == deck_id).all()
+
+# ==================== EXAMPLE CACHE CRUD ====================
+
+def get_example_cache(db: Session, word: str, language: str, example_type: str):
+    """Lấy entry cache ví dụ theo (word, language, example_type), kể cả đã hết hạn"""
+    return db.query(models.ExampleCache).filter(
+        models.ExampleCache.word == word,
+        models.ExampleCache.language == language,
+        models.ExampleCache.example_type == example_type
+    ).first()
+
+def upsert_example_cache(db: Session, word: str, language: str, example_type: str,
+                         examples, expires_at: datetime):
+    """Ghi (hoặc ghi đè) entry cache. examples=None nghĩa là entry âm"""
+    entry = get_example_cache(db, word, language, example_type)
+    if entry is None:
+        entry = models.ExampleCache(word=word, language=language, example_type=example_type)
+        db.add(entry)
+    entry.examples = examples
+    entry.not_found = examples is None
+    entry.expires_at = expires_at
+    db.commit()
+    return entry
+
+def delete_expired_example_cache(db: Session):
+    """Xóa các entry cache đã hết hạn, trả về số lượng đã xóa"""
+    count = db.query(models.ExampleCache).filter(
+        models.ExampleCache.expires_at < datetime.now(timezone.utc)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
+
+def get_flashcard_examples(db: Session, flashcard_id: int, example_type: str):
+    """Lấy ví dụ đã lưu của flashcard"""
+    return db.query(models.FlashcardExample).filter(
+        models.FlashcardExample.flashcard_id == flashcard_id,
+        models.FlashcardExample.example_type == example_type
+    ).first()
+
+def save_flashcard_examples(db: Session, flashcard_id: int, example_type: str, examples):
+    """Lưu ví dụ cho flashcard (ghi đè nếu đã có)"""
+    stored = get_flashcard_examples(db, flashcard_id, example_type)
+    if stored is None:
+        stored = models.FlashcardExample(flashcard_id=flashcard_id, example_type=example_type)
+        db.add(stored)
+    stored.examples = examples
+    db.commit()
+    return stored
+
+def get_flashcard_example_keys(db: Session, deck_id: int):
+    """Tập (flashcard_id, example_type) đã có ví dụ lưu sẵn trong deck"""
+    rows = db.query(models.FlashcardExample.flashcard_id, models.FlashcardExample.example_type).join(
+        models.Flashcard, models.Flashcard.id == models.FlashcardExample.flashcard_id
+    ).filter(models.Flashcard.deck_id == deck_id).all()
+    return {(flashcard_id, example_type) for flashcard_id, example_type in rows}
+
+# ==================== EXAMPLE PREFETCH JOB CRUD ====================
+
+ACTIVE_PREFETCH_STATUSES = ("pending", "running")
+
+def create_prefetch_job(db: Session, deck_id: int, example_types: str):
+    """
+    Tạo job tải trước ví dụ cho deck nếu deck chưa có job pending/running:
+    INSERT ... SELECT ... WHERE NOT EXISTS (1 câu lệnh, không kiểm tra rồi mới insert).
+    Trả về job mới, hoặc None nếu đã có job đang chạy
+    """
+    Job = models.ExamplePrefetchJob
+    now = datetime.now(timezone.utc)
+    active = select(Job.id).where(Job.deck_id == deck_id, Job.status.in_(ACTIVE_PREFETCH_STATUSES))
+    row = select(
+        literal(deck_id), literal(example_types), literal("pending"),
+        literal(0), literal(0), literal(0), literal(now, Job.updated_at.type)
+    ).where(~active.exists())
+    job_id = db.execute(insert(Job).from_select(
+        ["deck_id", "example_types", "status", "total", "completed", "failed", "updated_at"], row
+    ).returning(Job.id)).scalar()
+    db.commit()
+    return get_prefetch_job(db, job_id) if job_id is not None else None
+
+def fail_stale_prefetch_jobs(db: Session, deck_id: int, stale_before: datetime) -> int:
+    """
+    Đánh dấu failed các job pending/running của deck không có tiến độ từ trước stale_before
+    (process chạy job đã chết / restart) → không chặn tạo job mới mãi mãi. Trả về số job bị đánh dấu
+    """
+    Job = models.ExamplePrefetchJob
+    now = datetime.now(timezone.utc)
+    result = db.execute(update(Job).where(
+        Job.deck_id == deck_id,
+        Job.status.in_(ACTIVE_PREFETCH_STATUSES),
+        func.coalesce(Job.updated_at, Job.created_at) < stale_before,
+    ).values(status="failed", error="Job stalled (no progress)", finished_at=now, updated_at=now))
+    db.commit()
+    return result.rowcount
+
+def record_prefetch_progress(db: Session, job_id: int, succeeded: bool) -> bool:
+    """
+    Cộng 1 vào completed / failed + cập nhật heartbeat (UPDATE có điều kiện status = running).
+    False nếu job không còn running (đã bị đánh dấu stale) → worker nên dừng
+    """
+    Job = models.ExamplePrefetchJob
+    result = db.execute(update(Job).where(Job.id == job_id, Job.status == "running").values(
+        completed=Job.completed + (1 if succeeded else 0),
+        failed=Job.failed + (0 if succeeded else 1),
+        updated_at=datetime.now(timezone.utc),
+    ))
+    db.commit()
+    return result.rowcount == 1
+
+def get_prefetch_job(db: Session, job_id: int):
+    """Lấy job theo ID"""
+    return db.query(models.ExamplePrefetchJob).filter(models.ExamplePrefetchJob.id == job_id).first()
+
+def get_latest_prefetch_job(db: Session, deck_id: int):
+    """Lấy job mới nhất của deck"""
+    return db.query(models.ExamplePrefetchJob).filter(
+        models.ExamplePrefetchJob.deck_id == deck_id
+    ).order_by(models.ExamplePrefetchJob.id.desc()).first()
+
+# ==================== REVIEW STATE CRUD ====================
+
+def init_review_states(db: Session, deck_id: int, flashcard_ids: list):
+    """
+    Tạo review state (đến hạn ngay) khi thêm flashcard mới cho chủ deck và các user
+    đã bắt đầu học deck (deck_learners) - chưa commit
+    """
+    if not flashcard_ids:
+        return
+    owner_id = db.query(models.Deck.user_id).filter(models.Deck.id == deck_id).scalar()
+    if owner_id is None:
+        return
+    learner_ids = [
+        user_id for (user_id,) in
+        db.query(models.DeckLearner.user_id).filter(models.DeckLearner.deck_id == deck_id).all()
+    ]
+    now = datetime.now(timezone.utc)
+    db.execute(insert(models.ReviewState), [
+        {"user_id": user_id, "flashcard_id": fc_id, "deck_id": deck_id, "due_at": now,
+         "ease": 2.5, "interval_days": 0, "repetitions": 0, "lapses": 0}
+        for user_id in dict.fromkeys([owner_id, *learner_ids])
+        for fc_id in flashcard_ids
+    ])
+
+def missing_review_states_select(user_id_column, now: datetime):
+    """
+    SELECT (user, flashcard) chưa có review state, cột theo thứ tự REVIEW_STATE_INSERT_COLUMNS;
+    user_id_column = cột user (Deck.user_id / DeckLearner.user_id / literal), caller thêm FROM / WHERE
+    """
+    return select(
+        user_id_column, models.Flashcard.id, models.Flashcard.deck_id,
+        literal(2.5), literal(0.0), literal(0), literal(0),
+        literal(now, models.ReviewState.due_at.type)
+    ).where(
+        ~select(models.ReviewState.id).where(and_(
+            models.ReviewState.user_id == user_id_column,
+            models.ReviewState.flashcard_id == models.Flashcard.id
+        )).exists()
+    )
+
+REVIEW_STATE_INSERT_COLUMNS = [
+    "user_id", "flashcard_id", "deck_id", "ease", "interval_days", "repetitions", "lapses", "due_at"
+]
+
+def start_deck(db: Session, user_id: int, deck_id: int):
+    """
+    User bắt đầu học deck: ghi deck_learners (idempotent) + tạo review state cho flashcard
+    còn thiếu (INSERT ... SELECT với anti-join, 1 câu lệnh). Trả về số state đã thêm
+    """
+    db.execute(dialect_insert(db)(models.DeckLearner).values(
+        user_id=user_id, deck_id=deck_id
+    ).on_conflict_do_nothing(index_elements=["user_id", "deck_id"]))
+    missing = missing_review_states_select(literal(user_id), datetime.now(timezone.utc)).where(
+        models.Flashcard.deck_id == deck_id
+    )
+    # ON CONFLICT DO NOTHING: request khác start cùng deck song song → không IntegrityError
+    result = db.execute(dialect_insert(db)(models.ReviewState).from_select(
+        REVIEW_STATE_INSERT_COLUMNS, missing
+    ).on_conflict_do_nothing(index_elements=["user_id", "flashcard_id"]))
+    db.commit()
+    return result.rowcount
+
+def get_review_state(db: Session, user_id: int, flashcard_id: int):
+    """Lấy review state của user với flashcard"""
+    return db.query(models.ReviewState).filter(
+        models.ReviewState.user_id == user_id,
+        models.ReviewState.flashcard_id == flashcard_id
+    ).first()
+
+def get_review_states_for_flashcards(db: Session, user_id: int, flashcard_ids, for_update: bool = False):
+    """
+    Lấy review state của user cho nhiều flashcard (1 query IN).
+    for_update=True: khóa các dòng tới hết transaction (Postgres; SQLite bỏ qua FOR UPDATE)
+    """
+    if not flashcard_ids:
+        return []
+    query = db.query(models.ReviewState).filter(
+        models.ReviewState.user_id == user_id,
+        models.ReviewState.flashcard_id.in_(flashcard_ids)
+    )
+    if for_update:
+        query = query.with_for_update()
+    return query.all()
+
+def get_flashcard_decks(db: Session, flashcard_ids):
+    """Map flashcard_id -> deck_id cho nhiều flashcard (1 query IN)"""
+    if not flashcard_ids:
+        return {}
+    rows = db.query(models.Flashcard.id, models.Flashcard.deck_id).filter(
+        models.Flashcard.id.in_(flashcard_ids)
+    ).all()
+    return {fc_id: deck_id for fc_id, deck_id in rows}
+
+def get_due_flashcards(db: Session, user_id: int, deck_id: int, limit: int = 20):
+    """
+    Lấy N flashcard đến hạn sớm nhất: range scan trên ix_review_states_due
+    (user_id, deck_id, due_at) rồi join theo primary key → không phụ thuộc kích thước deck
+    """
+    return db.query(models.Flashcard, models.ReviewState).join(
+        models.ReviewState, models.ReviewState.flashcard_id == models.Flashcard.id
+    ).filter(
+        models.ReviewState.user_id == user_id,
+        models.ReviewState.deck_id == deck_id,
+        models.ReviewState.due_at <= datetime.now(timezone.utc)
+    ).order_by(models.ReviewState.due_at).limit(limit).all()
+
+# ==================== SYNC CRUD ====================
+
+def get_decks_changed_since(db: Session, user_id: int, since: datetime = None):
+    """
+    Deck của user được tạo / sửa sau `since` (None = tất cả), dạng dict kèm flashcard_count.
+    Thêm / xóa flashcard bump version → updated_at của deck đổi → count mới có trong delta
+    """
+    stmt = deck_rows_query().where(models.Deck.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(models.Deck.updated_at > since)
+    stmt = stmt.order_by(None).order_by(models.Deck.updated_at, models.Deck.id)
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+def get_flashcards_changed_since(db: Session, user_id: int, since: datetime = None):
+    """Flashcard trong các deck của user được tạo / sửa sau `since` (index deck_id, updated_at)"""
+    query = db.query(models.Flashcard).join(
+        models.Deck, models.Deck.id == models.Flashcard.deck_id
+    ).filter(models.Deck.user_id == user_id)
+    if since is not None:
+        query = query.filter(models.Flashcard.updated_at > since)
+    return query.order_by(models.Flashcard.updated_at).all()
+
+def get_tombstones_since(db: Session, user_id: int, since: datetime):
+    """Deck / flashcard bị xóa sau `since`"""
+    return db.query(models.SyncTombstone).filter(
+        models.SyncTombstone.user_id == user_id,
+        models.SyncTombstone.deleted_at > since
+    ).order_by(models.SyncTombstone.deleted_at).all()
+
+def delete_old_tombstones(db: Session, days: int):
+    """Dọn tombstone cũ hơn X ngày, trả về số lượng đã xóa"""
+    threshold = datetime.now(timezone.utc) - timedelta(days=days)
+    count = db.query(models.SyncTombstone).filter(
+        models.SyncTombstone.deleted_at < threshold
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
+
+# ==================== JOB RUN CRUD ====================
+
+def create_job_run(db: Session, job_id: str, owner: str):
+    db_run = models.JobRun(job_id=job_id, owner=owner, status="running")
+    db.add(db_run)
+    db.commit()
+    db.refresh(db_run)
+    return db_run
+
+def finish_job_run(db: Session, db_run: models.JobRun, status: str, error: str = None):
+    """Đánh dấu job chạy xong, tính duration"""
+    finished_at = datetime.now(timezone.utc)
+    started_at = db_run.started_at
+    if started_at.tzinfo is None:  # SQLite trả về naive datetime
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    db_run.status = status
+    db_run.error = error
+    db_run.finished_at = finished_at
+    db_run.duration_ms = int((finished_at - started_at).total_seconds() * 1000)
+    db.commit()
+    return db_run
+
+def get_recent_job_runs(db: Session, limit: int = 50, job_id: str = None):
+    query = db.query(models.JobRun)
+    if job_id:
+        query = query.filter(models.JobRun.job_id == job_id)
+    return query.order_by(models.JobRun.started_at.desc(), models.JobRun.id.desc()).limit(limit).all()
+
+def delete_old_job_runs(db: Session, days: int):
+    """Dọn lịch sử job cũ hơn X ngày, trả về số lượng đã xóa"""
+    threshold = datetime.now(timezone.utc) - timedelta(days=days)
+    count = db.query(models.JobRun).filter(
+        models.JobRun.started_at < threshold
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
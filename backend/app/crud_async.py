@@ -0,0 +1,38 @@
+"""
+Bản async của các đường đọc nóng trong crud.py (dùng với AsyncSession khi ASYNC_DB=true).
+Câu SELECT dùng chung builder với crud.py để 2 chế độ trả về cùng dữ liệu.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .crud import deck_rows_query, flashcard_rows_query
+
+
+async def get_user_decks_version(db: AsyncSession, user_id: int):
+    """Version danh sách deck của user (None nếu không có)"""
+    return await db.scalar(select(models.User.decks_version).where(models.User.id == user_id))
+
+
+async def get_deck_version(db: AsyncSession, deck_id: int):
+    """Version hiện tại của deck (None nếu không có)"""
+    return await db.scalar(select(models.Deck.version).where(models.Deck.id == deck_id))
+
+
+async def get_deck_row(db: AsyncSession, deck_id: int):
+    """1 deck dạng dict (kèm flashcard_count), None nếu không có"""
+    result = await db.execute(deck_rows_query().where(models.Deck.id == deck_id))
+    row = result.mappings().first()
+    return dict(row) if row else None
+
+
+async def get_deck_rows_by_user(db: AsyncSession, user_id: int):
+    """Decks của user dạng dict (kèm flashcard_count)"""
+    result = await db.execute(deck_rows_query().where(models.Deck.user_id == user_id))
+    return [dict(row) for row in result.mappings()]
+
+
+async def get_flashcard_rows_by_deck(db: AsyncSession, deck_id: int):
+    """Flashcards của deck dạng dict"""
+    result = await db.execute(flashcard_rows_query(deck_id))
+    return [dict(row) for row in result.mappings()]
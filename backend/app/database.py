@@ -3,6 +3,10 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
+from .utils import query_profiler
+from .utils.pool_metrics import InstrumentedQueuePool, PoolMetrics
+from .utils.sqlite_profile import apply_sqlite_profile, is_memory_url
+
 load_dotenv()
 
 # ================================
@@ -12,6 +16,35 @@ load_dotenv()
 # - prod : chạy trên Railway, bắt buộc dùng Postgres
 APP_ENV = os.getenv("APP_ENV", "dev").lower()
 
+# ================================
+# CONNECTION POOL (Postgres)
+# ================================
+# Tổng connection tối đa mỗi process = DB_POOL_SIZE + DB_MAX_OVERFLOW
+# → nhân với số worker/process phải < giới hạn connection của Railway
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))       # giây chờ connection rảnh
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))       # giây, -1 = không recycle
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 = không giới hạn
+
+# Số liệu pool, xem ở GET /api/internal/db-pool
+pool_metrics = PoolMetrics()
+
+
+def postgres_engine_kwargs() -> dict:
+    kwargs = {
+        "pool_pre_ping": True,  # tránh connection chết trên Railway
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return kwargs
+
+
 # ================================
 # CHỌN DATABASE_URL
 # ================================
@@ -33,10 +66,7 @@ if APP_ENV == "prod":
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
     # Engine cho Postgres
-    engine = create_engine(
-        DATABASE_URL,
-        pool_pre_ping=True,  # tránh connection chết trên Railway
-    )
+    engine = create_engine(DATABASE_URL, **postgres_engine_kwargs())
 
 else:
     # DEV: cho phép dùng SQLite cho tiện
@@ -44,16 +74,25 @@ else:
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./flashcard.db")
 
     if DATABASE_URL.startswith("sqlite"):
+        sqlite_kwargs = {}
+        if not is_memory_url(DATABASE_URL):
+            sqlite_kwargs["poolclass"] = InstrumentedQueuePool  # để xem số liệu pool khi dev
         engine = create_engine(
             DATABASE_URL,
             connect_args={"check_same_thread": False},  # cho SQLite local
+            **sqlite_kwargs,
         )
+        if not is_memory_url(DATABASE_URL):
+            apply_sqlite_profile(engine)  # WAL, busy_timeout, cache / mmap
     else:
         # Trường hợp bạn dev mà muốn dùng Postgres local
         if DATABASE_URL.startswith("postgres://"):
             DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-        engine = create_engine(DATABASE_URL)
+        engine = create_engine(DATABASE_URL, **postgres_engine_kwargs())
+
+pool_metrics.attach(engine)
+query_profiler.attach(engine)  # đếm SQL theo request khi SQL_PROFILE=true / assert_max_queries
 
 # ================================
 # SESSION & BASE
@@ -71,6 +110,100 @@ def get_db():
         db.close()
 
 
+# ================================
+# SQLITE READ-ONLY POOL (opt-in: SQLITE_READ_POOL=true)
+# ================================
+# Pool riêng mở file ở mode=ro cho các route chỉ đọc: với WAL, đọc chạy song song
+# với 1 writer mà không tranh connection của pool ghi. Postgres / tắt → dùng SessionLocal.
+SQLITE_READ_POOL = os.getenv("SQLITE_READ_POOL", "false").lower() in ("1", "true", "yes")
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+
+read_engine = None
+ReadSessionLocal = SessionLocal
+read_pool_metrics = None
+
+if SQLITE_READ_POOL and engine.dialect.name == "sqlite" and not is_memory_url(DATABASE_URL):
+    read_engine = create_engine(
+        f"sqlite:///file:{engine.url.database}?mode=ro&uri=true",
+        connect_args={"check_same_thread": False},
+        poolclass=InstrumentedQueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=SQLITE_READ_POOL_SIZE,
+    )
+    apply_sqlite_profile(read_engine, read_only=True)
+    read_pool_metrics = PoolMetrics()
+    read_pool_metrics.attach(read_engine)
+    query_profiler.attach(read_engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+def get_read_db():
+    """Dependency cho route CHỈ ĐỌC (pool read-only nếu bật, ngược lại như get_db)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ================================
+# ASYNC ENGINE (opt-in: ASYNC_DB=true)
+# ================================
+# Các route đọc nóng (xem routers/async_reads.py) chạy trên event loop thay vì
+# chiếm thread của threadpool. Cần driver async: aiosqlite (dev) / asyncpg (prod).
+# Ghi dữ liệu vẫn dùng engine sync ở trên.
+ASYNC_DB = os.getenv("ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+async_engine = None
+AsyncSessionLocal = None
+async_pool_metrics = None
+
+
+def to_async_url(url: str) -> str:
+    """sqlite:// → sqlite+aiosqlite://, postgresql:// → postgresql+asyncpg://"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgresql+psycopg2:"):
+        return url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    return url
+
+
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    if DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(to_async_url(DATABASE_URL))
+        if not is_memory_url(DATABASE_URL):
+            apply_sqlite_profile(async_engine.sync_engine)
+    else:
+        async_engine = create_async_engine(
+            to_async_url(DATABASE_URL),
+            pool_pre_ping=True,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            connect_args=(
+                {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+                if DB_STATEMENT_TIMEOUT_MS > 0 else {}
+            ),
+        )
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+    async_pool_metrics = PoolMetrics()
+    async_pool_metrics.attach(async_engine.sync_engine)
+    query_profiler.attach(async_engine.sync_engine)
+
+
+async def get_async_db():
+    """Dependency lấy AsyncSession (chỉ dùng khi ASYNC_DB=true)"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database is disabled (set ASYNC_DB=true)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def debug_print_db_config():
     """Optional: dùng để debug xem đang chạy DB gì (không bắt buộc gọi)."""
     print(f"[DB] APP_ENV     = {APP_ENV}")
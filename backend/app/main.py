@@ -1,17 +1,35 @@
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime
 import os
 
-from .routers import users, decks, flashcards, dictionary, quiz, tts, loyalty, chatgpt
-from .database import engine, Base, get_db, SessionLocal  # ← Thêm SessionLocal
+from .routers import users, decks, flashcards, dictionary, quiz, tts, loyalty, chatgpt, study, stats, search, sync
+from .database import engine, get_db, SessionLocal, ASYNC_DB, async_engine  # ← Thêm SessionLocal
+from . import database
 from .services.cleanup_service import cleanup_inactive_users
+from .services.chatgpt_service import chatgpt_service
+from .services.stats_service import refresh_stats_rollups, STATS_REFRESH_MINUTES
+from .services.scheduler_leader import (
+    LeaderElection, leader_job, SCHEDULER_HEARTBEAT_SECONDS, JOB_RUN_RETENTION_DAYS
+)
+from .migrations import migrate
+from .middleware.compression import CompressionMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .middleware.query_profiler import QueryProfilerMiddleware, SQL_PROFILE
+from .utils.metrics import registry as metrics_registry
+from .utils.pool_metrics import pool_collector
+from .utils.internal_auth import require_internal_token
 
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Tạo bảng / migration lúc startup (không chạy lúc import app.main).
+# Deploy nhiều instance: đặt AUTO_MIGRATE=false và chạy `python -m app.migrations` trước khi start
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
 
 app = FastAPI(title="Flashcard API")
 
@@ -25,7 +43,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Nén gzip / brotli theo Accept-Encoding (bỏ qua mp3 TTS, SSE)
+app.add_middleware(CompressionMiddleware)
+
+# Debug: đếm / đo SQL mỗi request, header X-Query-Profile + log khi nghi N+1
+if SQL_PROFILE:
+    app.add_middleware(QueryProfilerMiddleware)
+
+# Latency / status / in-flight theo route, xuất ở GET /metrics (đứng ngoài cùng → đo cả thời gian nén)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
+if ASYNC_DB:
+    # Phải đứng trước decks / flashcards để các GET async được match trước
+    from .routers import async_reads
+    app.include_router(async_reads.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(decks.router, prefix="/api")
 app.include_router(flashcards.router, prefix="/api")
@@ -34,9 +66,23 @@ app.include_router(quiz.router, prefix="/api")
 app.include_router(tts.router, prefix="/api")
 app.include_router(loyalty.router, prefix="/api")
 app.include_router(chatgpt.router, prefix="/api")
+app.include_router(study.router, prefix="/api")
+app.include_router(stats.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(sync.router, prefix="/api")
 
 # Setup APScheduler
+# Mọi worker đều chạy scheduler, nhưng job chỉ thực thi ở process leader (xem scheduler_leader.py)
 scheduler = BackgroundScheduler()
+leader = LeaderElection(engine)
+
+scheduler.add_job(
+    leader.heartbeat,
+    IntervalTrigger(seconds=SCHEDULER_HEARTBEAT_SECONDS),
+    id="scheduler_leader_heartbeat",
+    name="Acquire / renew scheduler leadership",
+    replace_existing=True
+)
 
 # ← Wrapper function để truyền db session vào cleanup
 def run_scheduled_cleanup():
@@ -49,16 +95,68 @@ def run_scheduled_cleanup():
 
 # Chạy cleanup mỗi ngày lúc 3 giờ sáng
 scheduler.add_job(
-    run_scheduled_cleanup,  # ← Đổi từ cleanup_inactive_users
+    leader_job(leader, "cleanup_inactive_users", run_scheduled_cleanup),  # ← Đổi từ cleanup_inactive_users
     CronTrigger(hour=3, minute=0),
     id="cleanup_inactive_users",
     name="Delete inactive users (30+ days)",
     replace_existing=True
 )
 
+# ← Dọn cache ví dụ Tatoeba đã hết hạn + tombstone sync quá hạn
+def run_scheduled_example_cache_purge():
+    """Xóa entry example_cache đã hết hạn (cả entry âm), tombstone và lịch sử job cũ"""
+    from .crud import delete_expired_example_cache, delete_old_tombstones, delete_old_job_runs
+    from .services.sync_service import SYNC_TOMBSTONE_TTL_DAYS
+    db = SessionLocal()
+    try:
+        delete_expired_example_cache(db)
+        delete_old_tombstones(db, SYNC_TOMBSTONE_TTL_DAYS)
+        delete_old_job_runs(db, JOB_RUN_RETENTION_DAYS)
+    finally:
+        db.close()
+
+scheduler.add_job(
+    leader_job(leader, "purge_example_cache", run_scheduled_example_cache_purge),
+    CronTrigger(hour=3, minute=30),
+    id="purge_example_cache",
+    name="Purge expired example cache and sync tombstones",
+    replace_existing=True
+)
+
+# ← Refresh bảng thống kê (rollup) cho dashboard
+def run_scheduled_stats_refresh(full: bool = False):
+    """Tính lại deck_stats / user_daily_stats"""
+    db = SessionLocal()
+    try:
+        refresh_stats_rollups(db, full=full)
+    finally:
+        db.close()
+
+scheduler.add_job(
+    leader_job(leader, "refresh_stats_rollups", run_scheduled_stats_refresh),
+    IntervalTrigger(minutes=STATS_REFRESH_MINUTES),
+    id="refresh_stats_rollups",
+    name="Refresh stats rollups (recent days)",
+    replace_existing=True
+)
+
+scheduler.add_job(
+    leader_job(leader, "refresh_stats_rollups_full", run_scheduled_stats_refresh),
+    CronTrigger(hour=3, minute=15),
+    kwargs={"full": True},
+    id="refresh_stats_rollups_full",
+    name="Refresh stats rollups (full)",
+    next_run_time=datetime.now(),  # chạy 1 lần ngay khi start để có dữ liệu
+    replace_existing=True
+)
+
 @app.on_event("startup")
 async def startup_event():
-    """Khởi động scheduler khi app start"""
+    """Migrate DB (nếu bật) rồi khởi động scheduler khi app start"""
+    if AUTO_MIGRATE:
+        await run_in_threadpool(migrate, engine)
+    # Giành leader trước khi start để job "chạy ngay khi start" không bị bỏ qua
+    await run_in_threadpool(leader.heartbeat)
     scheduler.start()
     print("✅ Auto-cleanup scheduler started (runs daily at 3 AM)")
 
@@ -66,7 +164,11 @@ async def startup_event():
 async def shutdown_event():
     """Dừng scheduler khi app shutdown"""
     scheduler.shutdown()
+    leader.release()
     print("🛑 Scheduler stopped")
+    await chatgpt_service.close()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 @app.get("/")
 def root():
@@ -86,3 +188,62 @@ def run_cleanup_manually(db: Session = Depends(get_db)):  # ← Thêm db depende
         "message": "Cleanup completed",
         "deleted_users": deleted_count
     }
+
+@app.get("/api/internal/db-pool", dependencies=[Depends(require_internal_token)])
+def get_db_pool_metrics():
+    """Số liệu connection pool (checkout wait, saturation, overflow) để chỉnh DB_POOL_*"""
+    data = {
+        "settings": {
+            "pool_size": database.DB_POOL_SIZE,
+            "max_overflow": database.DB_MAX_OVERFLOW,
+            "pool_timeout": database.DB_POOL_TIMEOUT,
+            "pool_recycle": database.DB_POOL_RECYCLE,
+            "statement_timeout_ms": database.DB_STATEMENT_TIMEOUT_MS,
+        },
+        "sync": database.pool_metrics.snapshot(engine),
+    }
+    if database.read_engine is not None:
+        data["read"] = database.read_pool_metrics.snapshot(database.read_engine)
+    if async_engine is not None:
+        data["async"] = database.async_pool_metrics.snapshot(async_engine.sync_engine)
+    return data
+
+@app.get("/api/internal/jobs", dependencies=[Depends(require_internal_token)])
+def get_scheduled_jobs(limit: int = 50, job_id: str = None, db: Session = Depends(get_db)):
+    """Process này có phải leader không + lịch sử chạy job gần đây"""
+    from .crud import get_recent_job_runs
+    return {
+        "owner": leader.owner,
+        "is_leader": leader.is_leader,
+        "runs": [
+            {
+                "id": run.id,
+                "job_id": run.job_id,
+                "owner": run.owner,
+                "status": run.status,
+                "error": run.error,
+                "started_at": run.started_at,
+                "finished_at": run.finished_at,
+                "duration_ms": run.duration_ms,
+            }
+            for run in get_recent_job_runs(db, limit=min(limit, 500), job_id=job_id)
+        ],
+    }
+
+
+def _db_pools():
+    pools = {"sync": (database.pool_metrics, engine)}
+    if database.read_engine is not None:
+        pools["read"] = (database.read_pool_metrics, database.read_engine)
+    if async_engine is not None:
+        pools["async"] = (database.async_pool_metrics, async_engine.sync_engine)
+    return pools
+
+
+metrics_registry.add_collector(pool_collector(_db_pools))
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_internal_token)])
+def get_metrics():
+    """Metrics dạng text cho Prometheus scrape"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
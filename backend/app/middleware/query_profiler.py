@@ -0,0 +1,43 @@
+"""
+Profile SQL theo từng request (opt-in: SQL_PROFILE=true, chỉ nên bật khi dev / debug).
+
+- Header X-Query-Profile: "count=12; time_ms=3.4; n_plus_one=1; worst=10x"
+- Log warning kèm danh sách câu SQL khi có shape lặp (nghi N+1)
+  hoặc số query vượt SQL_PROFILE_LOG_OVER
+"""
+import logging
+import os
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.query_profiler import profile_queries
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").lower() in ("1", "true", "yes")
+SQL_PROFILE_LOG_OVER = int(os.getenv("SQL_PROFILE_LOG_OVER", "20"))
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as profile:
+
+            async def send_with_profile(message: Message):
+                if message["type"] == "http.response.start":
+                    # Route sync đã chạy xong trước khi gửi header → số liệu đủ
+                    # (StreamingResponse: chỉ tính query trước byte đầu tiên)
+                    MutableHeaders(scope=message)["X-Query-Profile"] = profile.header_value()
+                await send(message)
+
+            await self.app(scope, receive, send_with_profile)
+
+        if profile.repeated_shapes() or profile.count > SQL_PROFILE_LOG_OVER:
+            logger.warning(f"SQL profile {scope['method']} {scope['path']}: {profile.describe()}")
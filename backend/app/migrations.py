@@ -0,0 +1,143 @@
+"""
+Migration nhẹ cho DB đã có sẵn (project không dùng Alembic).
+
+Base.metadata.create_all chỉ tạo bảng / index MỚI, không thêm cột vào bảng cũ,
+nên các cột thêm sau (vd. flashcards.content_hash) được thêm ở đây. Idempotent.
+
+Chạy lúc app startup (AUTO_MIGRATE=true, mặc định) hoặc riêng trước khi deploy:
+    python -m app.migrations
+"""
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, insert, inspect, select, text, update
+from sqlalchemy.engine import Engine
+
+from . import models
+from .database import Base
+from .utils.content_hash import flashcard_content_hash
+
+logger = logging.getLogger(__name__)
+
+# table -> [(column, DDL type)] được thêm sau khi bảng đã tồn tại
+ADDED_COLUMNS = {
+    "users": [
+        ("decks_version", "INTEGER NOT NULL DEFAULT 0"),
+    ],
+    "decks": [
+        ("version", "INTEGER NOT NULL DEFAULT 0"),
+    ],
+    "flashcards": [
+        ("content_hash", "VARCHAR(64)"),
+        ("updated_at", "TIMESTAMP WITH TIME ZONE"),
+    ],
+    "example_prefetch_jobs": [
+        ("updated_at", "TIMESTAMP WITH TIME ZONE"),
+    ],
+    "deck_stats": [
+        ("deck_version", "INTEGER"),
+    ],
+}
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def _add_missing_columns(engine: Engine):
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {col["name"] for col in inspector.get_columns(table)}
+            for name, ddl_type in columns:
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl_type}"))
+                    logger.info(f"Migration: added column {table}.{name}")
+
+
+def _create_missing_indexes(engine: Engine):
+    for index in models.Flashcard.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+def _backfill_content_hash(engine: Engine):
+    """Tính content_hash cho flashcard cũ, theo batch"""
+    table = models.Flashcard.__table__
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.vietnamese, table.c.target_language)
+                .where(table.c.content_hash.is_(None))
+                .limit(BACKFILL_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            conn.execute(
+                update(table).where(table.c.id == bindparam("row_id")).values(content_hash=bindparam("hash")),
+                [
+                    {"row_id": row.id, "hash": flashcard_content_hash(row.vietnamese, row.target_language)}
+                    for row in rows
+                ],
+            )
+            total += len(rows)
+    if total:
+        logger.info(f"Migration: backfilled content_hash for {total} flashcards")
+
+
+def _backfill_updated_at(engine: Engine):
+    """Flashcard cũ chưa có updated_at → lấy created_at"""
+    table = models.Flashcard.__table__
+    with engine.begin() as conn:
+        result = conn.execute(
+            update(table).where(table.c.updated_at.is_(None)).values(updated_at=table.c.created_at)
+        )
+    if result.rowcount:
+        logger.info(f"Migration: backfilled updated_at for {result.rowcount} flashcards")
+
+
+def _backfill_review_states(engine: Engine):
+    """
+    Review state cho flashcard cũ (tạo trước khi có spaced repetition) của chủ deck và
+    user trong deck_learners - flashcard mới đã có state từ lúc tạo → GET due chỉ đọc
+    """
+    from .crud import REVIEW_STATE_INSERT_COLUMNS, missing_review_states_select
+
+    now = datetime.now(timezone.utc)
+    owners = missing_review_states_select(models.Deck.user_id, now).select_from(models.Flashcard).join(
+        models.Deck, models.Deck.id == models.Flashcard.deck_id
+    )
+    learners = missing_review_states_select(models.DeckLearner.user_id, now).select_from(models.Flashcard).join(
+        models.DeckLearner, models.DeckLearner.deck_id == models.Flashcard.deck_id
+    )
+    total = 0
+    with engine.begin() as conn:
+        for missing in (owners, learners):
+            result = conn.execute(insert(models.ReviewState).from_select(REVIEW_STATE_INSERT_COLUMNS, missing))
+            total += result.rowcount
+    if total:
+        logger.info(f"Migration: backfilled {total} review states")
+
+
+def run_migrations(engine: Engine):
+    """Chạy sau Base.metadata.create_all"""
+    _add_missing_columns(engine)
+    _create_missing_indexes(engine)
+    _backfill_content_hash(engine)
+    _backfill_updated_at(engine)
+    _backfill_review_states(engine)
+
+
+def migrate(engine: Engine):
+    """Tạo bảng mới + migration cột / index + index tìm kiếm"""
+    from .services.search_service import ensure_search_index
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    ensure_search_index(engine)
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    migrate(engine)
+    logger.info("Migration completed")
@@ -1,8 +1,25 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Boolean, JSON, Float, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
+import secrets
 from .database import Base
 
+
+def utcnow():
+    """Timestamp phía Python (có microsecond) - CURRENT_TIMESTAMP của SQLite chỉ tới giây"""
+    return datetime.now(timezone.utc)
+
+
+def initial_version():
+    """
+    Version khởi đầu ngẫu nhiên cho counter dùng làm ETag: SQLite dùng lại id của dòng mới nhất
+    sau khi xóa → (id, version) của dòng mới không được trùng ETag client giữ từ dòng đã xóa.
+    < 2^30 → còn dư chỗ tăng trong INTEGER 32-bit của Postgres
+    """
+    return secrets.randbelow(2 ** 30)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -16,8 +33,15 @@ class User(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_activity_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Tăng mỗi khi danh sách deck của user đổi (ETag cho GET /decks/user/{id}), bắt đầu ngẫu nhiên
+    decks_version = Column(Integer, nullable=False, server_default="0", default=initial_version)
     
     decks = relationship("Deck", back_populates="user", cascade="all, delete-orphan")
+    review_states = relationship("ReviewState", back_populates="user", cascade="all, delete-orphan")
+    review_events = relationship("ReviewEvent", back_populates="user", cascade="all, delete-orphan")
+    daily_stats = relationship("UserDailyStats", cascade="all, delete-orphan")
+    learning_decks = relationship("DeckLearner", cascade="all, delete-orphan")
 
 
 class Deck(Base):
@@ -28,14 +52,23 @@ class Deck(Base):
     language = Column(String(50), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), default=utcnow, onupdate=utcnow)
+
+    # Tăng mỗi khi deck hoặc flashcard trong deck đổi (ETag cho GET deck / flashcards), bắt đầu ngẫu nhiên
+    version = Column(Integer, nullable=False, server_default="0", default=initial_version)
 
     user = relationship("User", back_populates="decks")
     flashcards = relationship("Flashcard", back_populates="deck", cascade="all, delete-orphan")
+    prefetch_jobs = relationship("ExamplePrefetchJob", back_populates="deck", cascade="all, delete-orphan")
+    learners = relationship("DeckLearner", cascade="all, delete-orphan")
 
 
 class Flashcard(Base):
     __tablename__ = "flashcards"
+    __table_args__ = (
+        Index("ix_flashcards_deck_content_hash", "deck_id", "content_hash"),
+        Index("ix_flashcards_deck_updated_at", "deck_id", "updated_at"),  # delta sync
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"))
@@ -44,6 +77,208 @@ class Flashcard(Base):
     pronunciation = Column(String(500), nullable=False)
     target_language = Column(Text, nullable=False)
 
+    # sha256(vietnamese + target_language đã chuẩn hoá) - phát hiện thẻ trùng khi import
+    content_hash = Column(String(64), nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
     
     deck = relationship("Deck", back_populates="flashcards")
+    generated_examples = relationship("FlashcardExample", back_populates="flashcard", cascade="all, delete-orphan")
+    review_states = relationship("ReviewState", back_populates="flashcard", cascade="all, delete-orphan")
+    review_events = relationship("ReviewEvent", back_populates="flashcard", cascade="all, delete-orphan")
+
+
+class ExampleCache(Base):
+    """Cache ví dụ Tatoeba theo (word, language, example_type), có TTL và entry âm (không có ví dụ)"""
+    __tablename__ = "example_cache"
+    __table_args__ = (
+        UniqueConstraint("word", "language", "example_type", name="uq_example_cache_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    word = Column(String(500), nullable=False)
+    language = Column(String(50), nullable=False)
+    example_type = Column(String(20), nullable=False)  # sentence | dialogue
+
+    examples = Column(JSON, nullable=True)
+    not_found = Column(Boolean, nullable=False, default=False)  # entry âm: Tatoeba không có ví dụ
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class FlashcardExample(Base):
+    """Ví dụ đã sinh cho từng flashcard, để lần xem sau đọc thẳng từ DB"""
+    __tablename__ = "flashcard_examples"
+    __table_args__ = (
+        UniqueConstraint("flashcard_id", "example_type", name="uq_flashcard_example_type"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    flashcard_id = Column(Integer, ForeignKey("flashcards.id", ondelete="CASCADE"), nullable=False)
+    example_type = Column(String(20), nullable=False)
+    examples = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    flashcard = relationship("Flashcard", back_populates="generated_examples")
+
+
+class ExamplePrefetchJob(Base):
+    """Job tải trước ví dụ cho toàn bộ flashcard trong 1 deck"""
+    __tablename__ = "example_prefetch_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), nullable=False, index=True)
+    example_types = Column(String(50), nullable=False)  # "sentence,dialogue"
+
+    status = Column(String(20), nullable=False, default="pending")  # pending | running | completed | failed
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)  # heartbeat: cập nhật mỗi lần có tiến độ
+
+    deck = relationship("Deck", back_populates="prefetch_jobs")
+
+
+class ReviewState(Base):
+    """Trạng thái ôn tập SM-2 của 1 user với 1 flashcard"""
+    __tablename__ = "review_states"
+    __table_args__ = (
+        UniqueConstraint("user_id", "flashcard_id", name="uq_review_state_user_flashcard"),
+        # Hàng đợi due: lấy N thẻ đến hạn của 1 deck = 1 range scan trên index này
+        Index("ix_review_states_due", "user_id", "deck_id", "due_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    flashcard_id = Column(Integer, ForeignKey("flashcards.id", ondelete="CASCADE"), nullable=False)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), nullable=False)  # denormalized cho index
+
+    ease = Column(Float, nullable=False, default=2.5)
+    interval_days = Column(Float, nullable=False, default=0)
+    repetitions = Column(Integer, nullable=False, default=0)
+    lapses = Column(Integer, nullable=False, default=0)
+
+    due_at = Column(DateTime(timezone=True), nullable=False)
+    last_reviewed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User", back_populates="review_states")
+    flashcard = relationship("Flashcard", back_populates="review_states")
+
+
+class DeckLearner(Base):
+    """
+    User (ngoài chủ deck) đã bắt đầu học 1 deck: có review state cho mọi flashcard của deck,
+    flashcard thêm sau cũng được tạo state (crud.init_review_states)
+    """
+    __tablename__ = "deck_learners"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), primary_key=True, index=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ReviewEvent(Base):
+    """Log ôn tập append-only; event_id do client sinh → gửi lại cùng batch không bị ghi 2 lần"""
+    __tablename__ = "review_events"
+    __table_args__ = (
+        UniqueConstraint("user_id", "event_id", name="uq_review_event_user_event"),
+        Index("ix_review_events_user_reviewed", "user_id", "reviewed_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String(64), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    flashcard_id = Column(Integer, ForeignKey("flashcards.id", ondelete="CASCADE"), nullable=False)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), nullable=False)
+    session_id = Column(String(64), nullable=True)
+
+    quality = Column(Integer, nullable=False)
+    reviewed_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User", back_populates="review_events")
+    flashcard = relationship("Flashcard", back_populates="review_events")
+
+
+# ==================== STATS ROLLUPS ====================
+
+class DeckStats(Base):
+    """
+    Số flashcard mỗi deck, refresh định kỳ bởi scheduler (xem stats_service).
+    Chỉ deck có version khác deck_version mới bị đếm lại; refreshed_at = lúc đếm gần nhất
+    """
+    __tablename__ = "deck_stats"
+
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    flashcard_count = Column(Integer, nullable=False, default=0)
+    deck_version = Column(Integer, nullable=True)  # Deck.version lúc đếm
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class UserDailyStats(Base):
+    """
+    Thống kê theo ngày của user:
+    - cards_added, reviews: refresh định kỳ từ flashcards / review_events
+    - points_earned: cộng dồn lúc cộng điểm (không có bảng log điểm để tính lại)
+    """
+    __tablename__ = "user_daily_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    cards_added = Column(Integer, nullable=False, default=0)
+    reviews = Column(Integer, nullable=False, default=0)
+    points_earned = Column(Integer, nullable=False, default=0)
+
+
+class SyncTombstone(Base):
+    """Ghi lại deck / flashcard đã xóa để delta sync báo cho client (xóa cứng + tombstone)"""
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_deleted_at", "user_id", "deleted_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    entity = Column(String(20), nullable=False)  # deck | flashcard
+    entity_id = Column(Integer, nullable=False)
+    deck_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+
+# ==================== SCHEDULER ====================
+
+class SchedulerLock(Base):
+    """Lease chọn leader cho scheduler khi không có advisory lock (SQLite)"""
+    __tablename__ = "scheduler_locks"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(200), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class JobRun(Base):
+    """Lịch sử chạy job định kỳ (chỉ process leader chạy job)"""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        Index("ix_job_runs_job_started_at", "job_id", "started_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(100), nullable=False)
+    owner = Column(String(200), nullable=False)
+    status = Column(String(20), nullable=False, default="running")  # running | success | failed
+    error = Column(Text, nullable=True)
+
+    started_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_ms = Column(Integer, nullable=True)
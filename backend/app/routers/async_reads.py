@@ -0,0 +1,59 @@
+"""
+Bản async của các GET đọc nhiều nhất (cùng path, cùng response với bản sync).
+
+Chỉ được include khi ASYNC_DB=true, và include TRƯỚC router decks / flashcards
+nên các route này được match trước; bản sync vẫn giữ cho chế độ mặc định.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud_async
+from ..database import get_async_db
+from ..utils.etag import make_etag, not_modified
+from ..utils.fast_json import FastJSONResponse
+
+router = APIRouter(tags=["async reads"])
+
+
+@router.get("/decks/user/{user_id}", include_in_schema=False)
+async def read_user_decks_async(user_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    version = await crud_async.get_user_decks_version(db, user_id)
+    headers = {}
+    if version is not None:
+        etag = make_etag("user-decks", user_id, version)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        headers["ETag"] = etag
+
+    return FastJSONResponse(await crud_async.get_deck_rows_by_user(db, user_id), headers=headers)
+
+
+@router.get("/decks/{deck_id}", include_in_schema=False)
+async def read_deck_async(deck_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    version = await crud_async.get_deck_version(db, deck_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Deck not found")
+    etag = make_etag("deck", deck_id, version)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    deck = await crud_async.get_deck_row(db, deck_id)
+    if deck is None:
+        raise HTTPException(status_code=404, detail="Deck not found")
+    return FastJSONResponse(deck, headers={"ETag": etag})
+
+
+@router.get("/flashcards/deck/{deck_id}", include_in_schema=False)
+async def read_deck_flashcards_async(deck_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    version = await crud_async.get_deck_version(db, deck_id)
+    headers = {}
+    if version is not None:
+        etag = make_etag("deck-flashcards", deck_id, version)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        headers["ETag"] = etag
+
+    return FastJSONResponse(await crud_async.get_flashcard_rows_by_deck(db, deck_id), headers=headers)
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict
-import os
-import openai
+from typing import List
+import json
 
-router = APIRouter(prefix="/chatgpt", tags=["chatgpt"])
+from ..services.chatgpt_service import chatgpt_service
+from ..utils.concurrency_limit import chatgpt_limiter
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+router = APIRouter(prefix="/chatgpt", tags=["chatgpt"])
 
 class Message(BaseModel):
     role: str
@@ -14,23 +15,36 @@ class Message(BaseModel):
 
 class ChatRequest(BaseModel):
     messages: List[Message]
+    stream: bool = False  # True → trả về Server-Sent Events
+
+
+def _sse(data) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
-@router.post("")
+# Slot giữ tới khi response gửi xong → stream SSE cũng được tính
+@router.post("", dependencies=[Depends(chatgpt_limiter)])
 async def chatgpt_endpoint(request: ChatRequest):
-    # Thêm system prompt kiểm soát chủ đề
-    system_prompt = {
-        "role": "system",
-        "content": "Bạn là trợ lý AI chỉ hỗ trợ các câu hỏi về học ngôn ngữ. Nếu câu hỏi không liên quan đến ngôn ngữ, hãy trả lời: 'Xin lỗi, tôi chỉ hỗ trợ học ngôn ngữ.'"
-    }
-    messages = [system_prompt] + [msg.dict() for msg in request.messages if msg.role != 'system']
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=512,
-            temperature=0.7
+    messages = chatgpt_service.build_messages([msg.dict() for msg in request.messages])
+
+    if request.stream:
+        async def event_stream():
+            try:
+                async for delta in chatgpt_service.stream_cached(messages):
+                    yield _sse({"delta": delta})
+                yield "data: [DONE]\n\n"
+            except Exception as e:
+                # Header 200 đã gửi → báo lỗi bằng event riêng
+                yield f"event: error\n{_sse({'detail': str(e)})}"
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
-        reply = response.choices[0].message["content"]
-        return {"reply": reply}
+
+    try:
+        reply, cached = await chatgpt_service.complete_cached(messages)
+        return {"reply": reply, "cached": cached}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
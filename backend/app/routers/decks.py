@@ -1,27 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse   # 👈 thêm dòng này
 from sqlalchemy.orm import Session
 from typing import List
 from .. import crud, schemas
-from ..database import get_db
+from ..database import get_db, get_read_db
+from ..utils.etag import make_etag, not_modified
+from ..utils.fast_json import FastJSONResponse
 import csv
 import io
 
 router = APIRouter(prefix="/decks", tags=["decks"])
 
 @router.get("/user/{user_id}", response_model=List[schemas.Deck])
-def read_user_decks(user_id: int, db: Session = Depends(get_db)):
-    decks = crud.get_decks_by_user(db, user_id=user_id)
-    for deck in decks:
-        deck.flashcard_count = len(deck.flashcards)
-    return decks
+def read_user_decks(user_id: int, request: Request, db: Session = Depends(get_read_db)):
+    # If-None-Match khớp version → 304, không query decks / flashcards
+    version = crud.get_user_decks_version(db, user_id)
+    headers = {}
+    if version is not None:
+        etag = make_etag("user-decks", user_id, version)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        headers["ETag"] = etag
+
+    # Fast path: query cột + đếm flashcard bằng GROUP BY, encode thẳng ra JSON
+    return FastJSONResponse(crud.get_deck_rows_by_user(db, user_id=user_id), headers=headers)
 
 @router.get("/{deck_id}", response_model=schemas.Deck)
-def read_deck(deck_id: int, db: Session = Depends(get_db)):
+def read_deck(deck_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    version = crud.get_deck_version(db, deck_id)
+    if version is not None:
+        etag = make_etag("deck", deck_id, version)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        response.headers["ETag"] = etag
+
     deck = crud.get_deck(db, deck_id=deck_id)
     if deck is None:
         raise HTTPException(status_code=404, detail="Deck not found")
-    deck.flashcard_count = len(deck.flashcards)
+    deck.flashcard_count = crud.count_flashcards_in_deck(db, deck_id)
     return deck
 
 @router.post("/", response_model=schemas.Deck, status_code=201)
@@ -45,7 +63,7 @@ def delete_deck(deck_id: int, db: Session = Depends(get_db)):
 
 # 🚀 NEW: Export CSV cho 1 deck
 @router.get("/{deck_id}/export-csv")
-def export_deck_csv(deck_id: int, db: Session = Depends(get_db)):
+def export_deck_csv(deck_id: int, db: Session = Depends(get_read_db)):
     """
     Xuất toàn bộ flashcards của 1 deck ra file CSV.
     Columns: vietnamese, pronunciation, target_language
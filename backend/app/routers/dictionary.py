@@ -1,21 +1,26 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
 from typing import List
+from ..database import get_read_db
 from ..schemas import DictionaryResult
 from ..services.dictionary_service import dictionary_service
+from ..utils.concurrency_limit import dictionary_limiter
 
 router = APIRouter(prefix="/dictionary", tags=["dictionary"])
 
-@router.get("/search", response_model=List[DictionaryResult])
+@router.get("/search", response_model=List[DictionaryResult], dependencies=[Depends(dictionary_limiter)])
 def search_dictionary(
     query: str = Query(..., min_length=1),
     language: str = Query(..., regex="^(EN|ZH|KO|JA)$"),
     limit: int = Query(10, ge=1, le=50),
-    kanji_only: bool = Query(False)   # <-- thêm dòng này
+    kanji_only: bool = Query(False),   # <-- thêm dòng này
+    db: Session = Depends(get_read_db)  # bản dịch dự phòng khi Google Translate lỗi
 ):
     """Search dictionary by Vietnamese keyword"""
     return dictionary_service.search_vietnamese(
         query,
         language,
         limit,
-        kanji_only=kanji_only           # <-- thêm dòng này
+        kanji_only=kanji_only,          # <-- thêm dòng này
+        db=db
     )
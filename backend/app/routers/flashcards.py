@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
 import csv
 import io
 from .. import crud, schemas, models
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..services.pronunciation import generate_pronunciation
-from ..services.ai_example_generator import generate_example_sentences, generate_dialogue
+from ..services.example_cache import get_or_generate_examples
+from ..services.ai_example_generator import ExampleServiceUnavailable
+from ..services.example_prefetch import parse_example_types, run_prefetch_job, start_prefetch_job
+from ..services.stats_service import record_points_earned
+from ..services.flashcard_import import import_flashcards
+from ..utils.etag import make_etag, not_modified
+from ..utils.fast_json import FastJSONResponse
+from ..utils.concurrency_limit import example_limiter
 
 
 router = APIRouter(prefix="/flashcards", tags=["flashcards"])
@@ -21,16 +28,28 @@ def add_points(db: Session, user: models.User, amount: int):
         return
     user.points = (user.points or 0) + amount
     db.add(user)
+    record_points_earned(db, user.id, amount)
     db.commit()
     db.refresh(user)
 
 
 @router.get("/deck/{deck_id}", response_model=List[schemas.Flashcard])
-def read_deck_flashcards(deck_id: int, db: Session = Depends(get_db)):
-    return crud.get_flashcards_by_deck(db, deck_id=deck_id)
+def read_deck_flashcards(deck_id: int, request: Request, db: Session = Depends(get_read_db)):
+    # If-None-Match khớp version của deck → 304, không đụng bảng flashcards
+    version = crud.get_deck_version(db, deck_id)
+    headers = {}
+    if version is not None:
+        etag = make_etag("deck-flashcards", deck_id, version)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        headers["ETag"] = etag
+
+    # Fast path: query cột, bỏ qua ORM + validate Pydantic, encode bằng orjson
+    return FastJSONResponse(crud.get_flashcard_rows_by_deck(db, deck_id=deck_id), headers=headers)
 
 @router.get("/{flashcard_id}", response_model=schemas.Flashcard)
-def read_flashcard(flashcard_id: int, db: Session = Depends(get_db)):
+def read_flashcard(flashcard_id: int, db: Session = Depends(get_read_db)):
     flashcard = crud.get_flashcard(db, flashcard_id=flashcard_id)
     if flashcard is None:
         raise HTTPException(status_code=404, detail="Flashcard not found")
@@ -59,29 +78,26 @@ def create_flashcard(flashcard: schemas.FlashcardCreate, db: Session = Depends(g
     return created_fc
 
 @router.post("/bulk", status_code=201)
-def create_flashcards_bulk(request: schemas.BulkImportRequest, db: Session = Depends(get_db)):
+def create_flashcards_bulk(
+    request: schemas.BulkImportRequest,
+    on_duplicate: str = Query("skip", pattern="^(skip|merge|keep)$"),
+    db: Session = Depends(get_db)
+):
     """Bulk import flashcards from CSV"""
     deck = crud.get_deck(db, request.deck_id)
     if not deck:
         raise HTTPException(status_code=404, detail="Deck not found")
     
-    flashcards_to_create = []
-    for fc in request.flashcards:
-        # Auto-generate pronunciation if empty
-        pronunciation = fc.pronunciation or generate_pronunciation(
-            fc.target_language, 
-            deck.language
-        )
-        flashcards_to_create.append(
-            schemas.FlashcardCreate(
-                deck_id=request.deck_id,
-                vietnamese=fc.vietnamese,
-                pronunciation=pronunciation,
-                target_language=fc.target_language
-            )
-        )
-    
-    created = crud.create_flashcards_bulk(db, flashcards_to_create)
+    rows = [
+        {
+            "vietnamese": fc.vietnamese,
+            "pronunciation": fc.pronunciation,
+            "target_language": fc.target_language
+        }
+        for fc in request.flashcards
+    ]
+    result = import_flashcards(db, deck, rows, on_duplicate)
+    created = result["created"]
 
     # Loyalty: +5 * n flashcards
     try:
@@ -90,11 +106,24 @@ def create_flashcards_bulk(request: schemas.BulkImportRequest, db: Session = Dep
     except Exception as e:
         print("Failed to add loyalty points:", e)
 
-    return {"message": f"Created {len(created)} flashcards", "count": len(created)}
+    return {
+        "message": f"Created {len(created)} flashcards",
+        "count": len(created),
+        "skipped": result["skipped"],
+        "merged": result["merged"]
+    }
 
 @router.post("/upload-csv/{deck_id}")
-async def upload_csv(deck_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Upload CSV file and import flashcards"""
+async def upload_csv(
+    deck_id: int,
+    file: UploadFile = File(...),
+    on_duplicate: str = Query("skip", pattern="^(skip|merge|keep)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload CSV file and import flashcards
+    on_duplicate: "skip" (mặc định) | "merge" | "keep" - xử lý thẻ trùng với deck / trong file
+    """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be CSV")
     
@@ -107,15 +136,15 @@ async def upload_csv(deck_id: int, file: UploadFile = File(...), db: Session = D
         csv_data = io.StringIO(contents.decode('utf-8'))
         csv_reader = csv.DictReader(csv_data)
         
-        flashcards = []
+        rows = []
         errors = []
         
         for line_num, row in enumerate(csv_reader, start=2):  # Start at 2 (header is line 1)
             try:
                 # Strip whitespace from all fields
-                vietnamese = row.get('vietnamese', '').strip()
-                target_language = row.get('target_language', '').strip()
-                pronunciation = row.get('pronunciation', '').strip()
+                vietnamese = (row.get('vietnamese') or '').strip()
+                target_language = (row.get('target_language') or '').strip()
+                pronunciation = (row.get('pronunciation') or '').strip()
                 
                 # Skip empty rows
                 if not vietnamese and not target_language:
@@ -130,28 +159,23 @@ async def upload_csv(deck_id: int, file: UploadFile = File(...), db: Session = D
                     errors.append(f"Line {line_num}: Missing 'target_language' field")
                     continue
                 
-                # Auto-generate pronunciation if empty
-                if not pronunciation:
-                    pronunciation = generate_pronunciation(target_language, deck.language)
-                
-                flashcards.append(
-                    schemas.FlashcardCreate(
-                        deck_id=deck_id,
-                        vietnamese=vietnamese,
-                        pronunciation=pronunciation,
-                        target_language=target_language
-                    )
-                )
+                # Pronunciation trống sẽ được sinh sau khi lọc trùng (chỉ cho thẻ mới)
+                rows.append({
+                    "vietnamese": vietnamese,
+                    "pronunciation": pronunciation,
+                    "target_language": target_language
+                })
             except Exception as e:
                 errors.append(f"Line {line_num}: {str(e)}")
         
-        if not flashcards and errors:
+        if not rows and errors:
             raise HTTPException(
                 status_code=400, 
                 detail=f"No valid flashcards found. Errors: {'; '.join(errors)}"
             )
         
-        created = crud.create_flashcards_bulk(db, deck_id, [fc.dict() for fc in flashcards])
+        result = import_flashcards(db, deck, rows, on_duplicate)
+        created = result["created"]
 
         # Loyalty: +5 * n flashcards
         try:
@@ -162,7 +186,9 @@ async def upload_csv(deck_id: int, file: UploadFile = File(...), db: Session = D
         
         response = {
             "message": f"Imported {len(created)} flashcards",
-            "count": len(created)
+            "count": len(created),
+            "skipped": result["skipped"],
+            "merged": result["merged"]
         }
         
         if errors:
@@ -170,6 +196,8 @@ async def upload_csv(deck_id: int, file: UploadFile = File(...), db: Session = D
         
         return response
         
+    except HTTPException:
+        raise
     except UnicodeDecodeError:
         raise HTTPException(
             status_code=400,
@@ -195,7 +223,7 @@ def delete_flashcard(flashcard_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Flashcard not found")
     return {"message": "Flashcard deleted successfully"}
 
-@router.post("/{flashcard_id}/generate-example")
+@router.post("/{flashcard_id}/generate-example", dependencies=[Depends(example_limiter)])
 def generate_example(
     flashcard_id: int,
     example_type: str = "sentence",  # "sentence" or "dialogue"
@@ -211,43 +239,57 @@ def generate_example(
     
     deck = crud.get_deck(db, flashcard.deck_id)
     
-    # Language mapping
-    lang_map = {
-        "EN": "English",
-        "ZH": "Chinese",
-        "JA": "Japanese",
-        "KO": "Korean"
-    }
-    
-    language_name = lang_map.get(deck.language, "English")
-    
     try:
-        if example_type == "sentence":
-            # Generate example sentences using AI
-            examples = generate_example_sentences(
-                flashcard.vietnamese,
-                flashcard.target_language,
-                flashcard.pronunciation,
-                language_name
-            )
-        else:  # dialogue
-            # Generate dialogue using AI
-            examples = generate_dialogue(
-                flashcard.vietnamese,
-                flashcard.target_language,
-                flashcard.pronunciation,
-                language_name
-            )
+        # Ưu tiên ví dụ đã lưu / cache, chỉ gọi Tatoeba khi cache miss
+        examples, cached = get_or_generate_examples(db, flashcard, deck.language, example_type)
         
         return {
             "flashcard_id": flashcard_id,
             "type": example_type,
-            "examples": examples
+            "examples": examples,
+            "cached": cached
         }
     
+    except ExampleServiceUnavailable as e:
+        # Tatoeba đang lỗi (circuit mở) và không có cache → báo client thử lại sau
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         print(f"Error generating example: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating example: {str(e)}")
+
+@router.post("/deck/{deck_id}/prefetch-examples", response_model=schemas.ExamplePrefetchJob, status_code=202)
+def prefetch_deck_examples(
+    deck_id: int,
+    background_tasks: BackgroundTasks,
+    example_type: str = "all",  # "all", "sentence", "dialogue"
+    db: Session = Depends(get_db)
+):
+    """
+    Tải trước ví dụ (sentence/dialogue) cho mọi flashcard trong deck, chạy nền.
+    Nếu deck đang có job chạy thì trả về job đó thay vì tạo job mới
+    (job không có tiến độ quá PREFETCH_STALE_SECONDS bị đánh dấu failed, không chặn deck mãi).
+    """
+    deck = crud.get_deck(db, deck_id)
+    if not deck:
+        raise HTTPException(status_code=404, detail="Deck not found")
+
+    example_types = parse_example_types(example_type)
+    if not example_types:
+        raise HTTPException(status_code=400, detail="example_type must be all, sentence or dialogue")
+
+    job, created = start_prefetch_job(db, deck_id, example_types)
+    if created:
+        background_tasks.add_task(run_prefetch_job, job.id)
+    return job
+
+@router.get("/deck/{deck_id}/prefetch-examples", response_model=schemas.ExamplePrefetchJob)
+def read_prefetch_job(deck_id: int, db: Session = Depends(get_read_db)):
+    """Xem tiến độ job tải trước ví dụ mới nhất của deck"""
+    job = crud.get_latest_prefetch_job(db, deck_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No prefetch job for this deck")
+    return job
+
 @router.delete("/deck/{deck_id}/all", status_code=200)
 def delete_all_flashcards(deck_id: int, db: Session = Depends(get_db)):
     """Xóa tất cả flashcard trong một deck"""
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from .. import schemas
+from ..database import get_read_db
+from ..services.search_service import search_user_flashcards
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/users/{user_id}/flashcards", response_model=schemas.FlashcardSearchPage)
+def search_flashcards(
+    user_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    deck_id: Optional[int] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db)
+):
+    """Tìm flashcard (tiếng Việt / từ vựng / phát âm) trong tất cả deck của user"""
+    return search_user_flashcards(db, user_id, q, limit=limit, offset=offset, deck_id=deck_id)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from .. import schemas
+from ..database import get_read_db
+from ..services.stats_service import get_user_stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/users/{user_id}", response_model=schemas.UserStats)
+def read_user_stats(
+    user_id: int,
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Thống kê dashboard của user (số deck, số thẻ, thẻ thêm / lượt ôn / điểm theo ngày).
+    Chỉ đọc bảng rollup - số liệu có thể trễ tối đa STATS_REFRESH_MINUTES phút.
+    """
+    return get_user_stats(db, user_id, days)
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+from .. import crud, schemas
+from ..database import get_db
+from ..services.spaced_repetition import ingest_review_batch, record_review, start_deck
+
+router = APIRouter(prefix="/study", tags=["study"])
+
+
+@router.get("/users/{user_id}/decks/{deck_id}/due", response_model=List[schemas.DueFlashcard])
+def read_due_flashcards(
+    user_id: int,
+    deck_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """
+    Lấy N flashcard đến hạn ôn (sớm nhất trước) - chỉ đọc phần đến hạn,
+    không tải cả deck như /flashcards/deck/{deck_id}
+    """
+    if crud.get_user(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if crud.get_deck(db, deck_id) is None:
+        raise HTTPException(status_code=404, detail="Deck not found")
+
+    due = crud.get_due_flashcards(db, user_id, deck_id, limit)
+    return [
+        {
+            "id": fc.id,
+            "deck_id": fc.deck_id,
+            "vietnamese": fc.vietnamese,
+            "pronunciation": fc.pronunciation,
+            "target_language": fc.target_language,
+            "created_at": fc.created_at,
+            "updated_at": fc.updated_at,
+            "due_at": state.due_at,
+            "ease": state.ease,
+            "interval_days": state.interval_days,
+            "repetitions": state.repetitions,
+            "lapses": state.lapses,
+        }
+        for fc, state in due
+    ]
+
+
+@router.post("/users/{user_id}/decks/{deck_id}/start", response_model=schemas.StudyDeckStart)
+def start_studying_deck(user_id: int, deck_id: int, db: Session = Depends(get_db)):
+    """
+    Bắt đầu học deck của người khác (gọi 1 lần, gọi lại không sao): tạo review state cho mọi
+    flashcard → GET .../due chỉ đọc. Chủ deck đã có state sẵn, không cần gọi
+    """
+    if crud.get_user(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if crud.get_deck(db, deck_id) is None:
+        raise HTTPException(status_code=404, detail="Deck not found")
+
+    added = start_deck(db, user_id, deck_id)
+    return {"user_id": user_id, "deck_id": deck_id, "added": added}
+
+
+@router.post("/review", response_model=schemas.ReviewState)
+def review_flashcard(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
+    """Ghi nhận kết quả ôn 1 flashcard (quality 0-5) và trả về lịch ôn mới"""
+    flashcard = crud.get_flashcard(db, review.flashcard_id)
+    if flashcard is None:
+        raise HTTPException(status_code=404, detail="Flashcard not found")
+    if crud.get_user(db, review.user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return record_review(db, review.user_id, flashcard, review.quality)
+
+
+@router.post("/reviews/batch", response_model=schemas.ReviewBatchResult)
+def review_flashcards_batch(batch: schemas.ReviewBatch, db: Session = Depends(get_db)):
+    """
+    Gửi cả phiên học 1 lần (thay vì 1 request / 1 commit mỗi lần lật thẻ).
+    Gửi lại cùng batch (retry khi mất mạng) không bị tính 2 lần nhờ event_id.
+    """
+    if crud.get_user(db, batch.user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return ingest_review_batch(db, batch.user_id, batch.session_id, batch.events)
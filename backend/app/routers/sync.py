@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from .. import schemas
+from ..database import get_read_db
+from ..services.sync_service import InvalidCursor, get_changes
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("/users/{user_id}/changes", response_model=schemas.SyncChanges)
+def read_changes(
+    user_id: int,
+    since: Optional[str] = Query(None, description="Cursor trả về từ lần sync trước"),
+    db: Session = Depends(get_read_db)
+):
+    """Delta sync: chỉ trả về deck / flashcard thay đổi sau cursor (kèm id đã xóa)"""
+    try:
+        return get_changes(db, user_id, since)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import FileResponse
 from ..services.tts_service import tts_service
+from ..utils.circuit_breaker import CircuitBreakerError
+from ..utils.concurrency_limit import tts_limiter
 import os
 
 router = APIRouter(prefix="/tts", tags=["tts"])
 
-@router.get("/speak")
+@router.get("/speak", dependencies=[Depends(tts_limiter)])
 def text_to_speech(
     text: str = Query(..., min_length=1),
     language: str = Query(..., regex="^(EN|ZH|KO|JA)$")
@@ -26,6 +28,9 @@ def text_to_speech(
                 "Access-Control-Allow-Origin": "*"
             }
         )
+    except CircuitBreakerError as e:
+        # gTTS lỗi liên tục / quá timeout và chưa có file cache → báo client thử lại sau
+        raise HTTPException(status_code=503, detail=f"TTS unavailable: {e}", headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         print(f"TTS Error: {e}")
         raise HTTPException(status_code=500, detail=f"TTS Error: {str(e)}")
\ No newline at end of file
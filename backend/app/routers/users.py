@@ -11,6 +11,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 def get_users(db: Session = Depends(get_db)):
     """Lấy tất cả users với thông tin countdown"""
     users = crud.get_all_users(db)
+    deck_counts = crud.get_deck_counts_by_user(db)
     
     # Thêm thông tin countdown và deck count
     result = []
@@ -24,7 +25,7 @@ def get_users(db: Session = Depends(get_db)):
             "created_at": user.created_at,
             "last_activity_at": user.last_activity_at,
             "days_until_deletion": crud.get_days_until_deletion(user),
-            "deck_count": len(user.decks)
+            "deck_count": deck_counts.get(user.id, 0)
         }
         result.append(user_dict)
     
@@ -49,7 +50,7 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
         "created_at": user.created_at,
         "last_activity_at": user.last_activity_at,
         "days_until_deletion": crud.get_days_until_deletion(user),
-        "deck_count": len(user.decks)
+        "deck_count": crud.get_deck_counts_by_user(db, [user.id]).get(user.id, 0)
     }
 
 @router.post("", response_model=schemas.User)
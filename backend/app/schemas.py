@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 
 # ==================== USER SCHEMAS ====================
 
@@ -82,11 +82,144 @@ class Flashcard(FlashcardBase):
     id: int
     deck_id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class ExamplePrefetchJob(BaseModel):
+    id: int
+    deck_id: int
+    example_types: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# ==================== STUDY (SPACED REPETITION) ====================
+
+class ReviewCreate(BaseModel):
+    user_id: int
+    flashcard_id: int
+    quality: int = Field(..., ge=0, le=5)  # SM-2: 0 = quên hẳn ... 5 = nhớ ngay
+
+
+class ReviewState(BaseModel):
+    user_id: int
+    flashcard_id: int
+    deck_id: int
+    ease: float
+    interval_days: float
+    repetitions: int
+    lapses: int
+    due_at: datetime
+    last_reviewed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ReviewEventIn(BaseModel):
+    event_id: str = Field(..., min_length=1, max_length=64)  # client sinh (vd. UUID)
+    flashcard_id: int
+    quality: int = Field(..., ge=0, le=5)
+    reviewed_at: Optional[datetime] = None
+
+
+class ReviewBatch(BaseModel):
+    user_id: int
+    session_id: Optional[str] = Field(None, max_length=64)
+    events: List[ReviewEventIn] = Field(..., max_length=1000)
+
+
+class ReviewBatchResult(BaseModel):
+    received: int
+    applied: int
+    duplicates: int
+    invalid_flashcard_ids: List[int] = []
+
+
+class DueFlashcard(Flashcard):
+    due_at: datetime
+    ease: float
+    interval_days: float
+    repetitions: int
+    lapses: int
+
+
+class StudyDeckStart(BaseModel):
+    user_id: int
+    deck_id: int
+    added: int  # số review state vừa tạo (0 nếu đã bắt đầu trước đó)
+
+
+# ==================== STATS ====================
+
+class DeckStats(BaseModel):
+    deck_id: int
+    flashcard_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class DailyStats(BaseModel):
+    day: date
+    cards_added: int
+    reviews: int
+    points_earned: int
+
+    class Config:
+        from_attributes = True
+
+
+class UserStats(BaseModel):
+    user_id: int
+    deck_count: int
+    flashcard_count: int
+    cards_added: int      # trong khoảng `days` ngày gần nhất
+    reviews: int
+    points_earned: int
+    decks: List[DeckStats]
+    daily: List[DailyStats]
+    refreshed_at: Optional[datetime] = None
+
+
+# ==================== SEARCH ====================
+
+class FlashcardSearchHit(Flashcard):
+    deck_name: str
+    score: float
+
+
+class FlashcardSearchPage(BaseModel):
+    items: List[FlashcardSearchHit]
+    limit: int
+    offset: int
+    has_more: bool
+
+
+# ==================== SYNC ====================
+
+class SyncChanges(BaseModel):
+    cursor: str            # gửi lại ở lần sync sau (?since=cursor); thay đổi gần đây có thể bị trả lại → upsert theo id
+    full: bool             # True: snapshot đầy đủ, client phải thay toàn bộ dữ liệu local
+    decks: List[Deck]
+    flashcards: List[Flashcard]
+    deleted_deck_ids: List[int]
+    deleted_flashcard_ids: List[int]
+
+
 # ==================== CSV IMPORT ====================
 
 class CSVFlashcard(BaseModel):
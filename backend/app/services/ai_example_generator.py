@@ -1,10 +1,19 @@
 import os
-import requests
-from typing import List, Dict
+import sqlite3
+from typing import Callable, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+from .pronunciation import get_kakasi, get_hangul_transliter
+from ..utils.circuit_breaker import CircuitBreakerError, tatoeba_breaker
+from ..utils.metrics import track_external
+
 load_dotenv()
 
+# Nguồn câu ví dụ: "remote" (API Tatoeba) | "local" (corpus SQLite FTS5, xem local_corpus.py)
+EXAMPLE_BACKEND = os.getenv("EXAMPLE_BACKEND", "remote").lower()
+# Đổi được sang server giả khi test (vd. http://127.0.0.1:9000/search)
+TATOEBA_API_URL = os.getenv("TATOEBA_API_URL", "https://tatoeba.org/en/api_v0/search")
+
 # Language code mapping
 TATOEBA_LANG_CODES = {
     "Chinese": "cmn",
@@ -14,6 +23,22 @@ TATOEBA_LANG_CODES = {
 }
 
 
+class ExampleNotFoundError(Exception):
+    """Tatoeba trả lời bình thường nhưng không có đủ ví dụ (kết quả này cache được)"""
+
+
+class ExampleServiceError(Exception):
+    """Không gọi được Tatoeba (lỗi mạng / parse) - KHÔNG được cache"""
+
+
+class ExampleServiceUnavailable(ExampleServiceError):
+    """Circuit breaker Tatoeba đang mở / quá timeout budget - thử lại sau retry_after giây"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 def search_tatoeba(word: str, from_lang: str, to_lang: str = "vie", limit: int = 10) -> List[Dict]:
     """
     Search Tatoeba database for example sentences
@@ -26,11 +51,14 @@ def search_tatoeba(word: str, from_lang: str, to_lang: str = "vie", limit: int =
     
     Returns:
         List of sentence examples with translations
+
+    Raises:
+        ExampleServiceError: Tatoeba lỗi mạng hoặc trả về dữ liệu không parse được
+        ExampleServiceUnavailable: circuit breaker đang mở hoặc quá timeout budget
     """
+    import requests  # import lúc gọi lần đầu, không tốn lúc khởi động app
+
     try:
-        # Tatoeba API endpoint
-        url = "https://tatoeba.org/en/api_v0/search"
-        
         params = {
             "query": word,
             "from": from_lang,
@@ -43,10 +71,16 @@ def search_tatoeba(word: str, from_lang: str, to_lang: str = "vie", limit: int =
             "sort": "relevance"
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        def fetch():
+            # Đo trong hàm breaker chạy → lời gọi bị chặn khi circuit mở không tính là lỗi của Tatoeba
+            with track_external("tatoeba"):
+                # timeout của requests = budget của breaker → thread không treo lâu hơn budget
+                response = requests.get(TATOEBA_API_URL, params=params, timeout=tatoeba_breaker.call_timeout)
+                response.raise_for_status()
+                return response.json()
+
+        data = tatoeba_breaker.call(fetch)
         
-        data = response.json()
         results = []
         
         if "results" in data:
@@ -76,49 +110,87 @@ def search_tatoeba(word: str, from_lang: str, to_lang: str = "vie", limit: int =
         print(f"✅ Found {len(results)} examples from Tatoeba")
         return results
         
+    except CircuitBreakerError as e:
+        print(f"⚠️ Tatoeba unavailable: {e}")
+        raise ExampleServiceUnavailable(f"Tatoeba unavailable: {e}", e.retry_after) from e
     except requests.exceptions.RequestException as e:
         print(f"⚠️ Tatoeba API error: {e}")
-        return []
+        raise ExampleServiceError(f"Tatoeba API error: {e}") from e
     except Exception as e:
         print(f"⚠️ Tatoeba parsing error: {e}")
-        return []
+        raise ExampleServiceError(f"Tatoeba parsing error: {e}") from e
+
+
+def search_examples(word: str, from_lang: str, to_lang: str = "vie", limit: int = 10) -> List[Dict]:
+    """Tìm câu ví dụ từ backend đang cấu hình (EXAMPLE_BACKEND)"""
+    if EXAMPLE_BACKEND == "local":
+        from .local_corpus import search_local_corpus, LocalCorpusUnavailable
+        try:
+            results = search_local_corpus(word, from_lang, to_lang, limit)
+        except (LocalCorpusUnavailable, sqlite3.Error) as e:
+            print(f"⚠️ Local corpus error: {e}")
+            raise ExampleServiceError(f"Local corpus error: {e}") from e
+        print(f"✅ Found {len(results)} examples in local corpus")
+        return results
+
+    return search_tatoeba(word, from_lang, to_lang, limit)
+
+
+def _get_romanizer(language: str) -> Callable[[str], str]:
+    """Trả về hàm romanize cho ngôn ngữ, dùng converter chung của cả process"""
+    if language == "Japanese":
+        kks = get_kakasi()
+        return lambda text: " ".join([item["hira"] for item in kks.convert(text)])
+
+    if language == "Chinese":
+        from pypinyin import lazy_pinyin
+        return lambda text: " ".join(lazy_pinyin(text))
+
+    if language == "Korean":
+        return get_hangul_transliter().translit
+
+    return lambda text: text
+
+
+def romanize_batch(texts: List[str], language: str) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Romanize cả list câu trong 1 lượt (khởi tạo converter 1 lần)
+
+    Returns:
+        List (pronunciation, error) theo đúng thứ tự input - mỗi câu lỗi riêng
+    """
+    try:
+        romanize = _get_romanizer(language)
+    except Exception as e:
+        print(f"⚠️ Romanizer init error ({language}): {e}")
+        return [(None, f"{type(e).__name__}: {e}")] * len(texts)
+
+    results = []
+    for text in texts:
+        try:
+            results.append((romanize(text), None))
+        except Exception as e:
+            print(f"⚠️ Romanize error ({language}) for {text!r}: {e}")
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
 
 
 def add_pronunciation(sentences: List[Dict], pronunciation: str, language: str) -> List[Dict]:
-    """Add pronunciation to sentences based on language"""
-    
-    for sentence in sentences:
-        target_text = sentence["target"]
-        
-        if language == "Japanese":
-            try:
-                import pykakasi
-                kks = pykakasi.kakasi()
-                result = kks.convert(target_text)
-                sentence["pronunciation"] = " ".join([item["hira"] for item in result])
-            except:
-                sentence["pronunciation"] = pronunciation
-                
-        elif language == "Chinese":
-            try:
-                from pypinyin import lazy_pinyin
-                sentence["pronunciation"] = " ".join(lazy_pinyin(target_text))
-            except:
-                sentence["pronunciation"] = pronunciation
-                
-        elif language == "Korean":
-            try:
-                from hangul_romanize import Transliter
-                from hangul_romanize.rule import academic
-                transliter = Transliter(academic)
-                sentence["pronunciation"] = transliter.translit(target_text)
-            except:
-                sentence["pronunciation"] = pronunciation
+    """
+    Add pronunciation to sentences based on language
+    Câu nào romanize lỗi thì dùng pronunciation của flashcard và ghi lỗi vào "pronunciation_error"
+    """
+    romanized = romanize_batch([sentence["target"] for sentence in sentences], language)
+
+    for sentence, (value, error) in zip(sentences, romanized):
+        if error is None:
+            sentence["pronunciation"] = value
         else:
-            sentence["pronunciation"] = target_text
-        
+            sentence["pronunciation"] = pronunciation
+            sentence["pronunciation_error"] = error
+
         sentence["context"] = f"Example from Tatoeba (ID: {sentence.get('id', 'N/A')})"
-    
+
     return sentences
 
 
@@ -136,7 +208,7 @@ def generate_example_sentences(
     
     print(f"🔍 Searching Tatoeba for: {target_language} ({language})")
     
-    tatoeba_results = search_tatoeba(target_language, lang_code, "vie", limit=10)
+    tatoeba_results = search_examples(target_language, lang_code, "vie", limit=10)
     
     if len(tatoeba_results) >= 3:
         sentences = tatoeba_results[:3]
@@ -147,7 +219,7 @@ def generate_example_sentences(
         sentences = add_pronunciation(tatoeba_results, pronunciation, language)
         return sentences
     else:
-        raise Exception(f"No examples found in Tatoeba for: {target_language}")
+        raise ExampleNotFoundError(f"No examples found in Tatoeba for: {target_language}")
 
 
 def generate_dialogue(
@@ -161,10 +233,10 @@ def generate_dialogue(
     """
     
     lang_code = TATOEBA_LANG_CODES.get(language, "eng")
-    tatoeba_examples = search_tatoeba(target_language, lang_code, "vie", limit=5)
+    tatoeba_examples = search_examples(target_language, lang_code, "vie", limit=5)
     
     if not tatoeba_examples or len(tatoeba_examples) < 3:
-        raise Exception(f"Not enough examples found in Tatoeba for dialogue: {target_language}")
+        raise ExampleNotFoundError(f"Not enough examples found in Tatoeba for dialogue: {target_language}")
     
     # Convert examples to dialogue format
     dialogue = []
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..utils.metrics import track_external
+from ..utils.ttl_cache import TTLCache
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# OPENAI_BASE_URL: trỏ sang server OpenAI-compatible khác (vd. fake server local khi test)
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+
+# Cache câu trả lời theo đuôi hội thoại (N message cuối, đã chuẩn hoá)
+# Mặc định 2 = câu hỏi + câu trả lời trước đó → câu hỏi nối tiếp ("giải thích thêm") không bị lẫn
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "500"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "86400"))
+CHAT_CACHE_TAIL_MESSAGES = int(os.getenv("CHAT_CACHE_TAIL_MESSAGES", "2"))
+
+# Ngân sách token (ước lượng) cho lịch sử gửi lên OpenAI, message cũ bị cắt trước
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "2000"))
+
+SYSTEM_PROMPT = {
+    "role": "system",
+    "content": "Bạn là trợ lý AI chỉ hỗ trợ các câu hỏi về học ngôn ngữ. Nếu câu hỏi không liên quan đến ngôn ngữ, hãy trả lời: 'Xin lỗi, tôi chỉ hỗ trợ học ngôn ngữ.'"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Ước lượng số token không cần tokenizer:
+    CJK/Hangul/Kana ~1 token mỗi ký tự, còn lại ~4 ký tự / token
+    """
+    cjk = sum(1 for ch in text if '\u3040' <= ch <= '\u9fff' or '\uac00' <= ch <= '\ud7af')
+    return cjk + (len(text) - cjk + 3) // 4 + 4  # +4: overhead role/format mỗi message
+
+
+def trim_history(messages: List[Dict], budget: int = None) -> List[Dict]:
+    """
+    Cắt bớt message cũ cho vừa ngân sách token.
+    Luôn giữ message cuối cùng; system prompt không tính vào đây.
+    """
+    budget = CHAT_CONTEXT_TOKEN_BUDGET if budget is None else budget
+    kept = []
+    used = 0
+    for msg in reversed(messages):
+        cost = estimate_tokens(msg["content"])
+        if kept and used + cost > budget:
+            break
+        kept.append(msg)
+        used += cost
+    return list(reversed(kept))
+
+
+def _normalize_content(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+class ChatGPTService:
+    def __init__(self):
+        # Client (và connection pool) tạo lúc dùng lần đầu, dùng lại cho mọi request
+        self._client: Optional["AsyncOpenAI"] = None
+        self.cache = TTLCache(maxsize=CHAT_CACHE_SIZE, ttl=CHAT_CACHE_TTL)
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            # SDK openai import mất vài trăm ms → chỉ import khi gọi ChatGPT lần đầu
+            import httpx
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=OPENAI_BASE_URL,
+                timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+                max_retries=OPENAI_MAX_RETRIES,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                    ),
+                ),
+            )
+        return self._client
+
+    async def close(self):
+        """Đóng connection pool (gọi khi app shutdown)"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def build_messages(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Thêm system prompt kiểm soát chủ đề, bỏ system prompt do client gửi lên,
+        cắt lịch sử cũ theo CHAT_CONTEXT_TOKEN_BUDGET
+        """
+        history = [msg for msg in messages if msg["role"] != "system"]
+        return [SYSTEM_PROMPT] + trim_history(history)
+
+    def cache_key(self, messages: List[Dict]) -> str:
+        """Key cache = hash của N message cuối (bỏ system prompt), đã chuẩn hoá"""
+        tail = [msg for msg in messages if msg["role"] != "system"][-CHAT_CACHE_TAIL_MESSAGES:]
+        normalized = [(msg["role"], _normalize_content(msg["content"])) for msg in tail]
+        raw = json.dumps([OPENAI_MODEL, normalized], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def complete_cached(self, messages: List[Dict]) -> Tuple[str, bool]:
+        """Như complete() nhưng dùng cache. Trả về (reply, cached)"""
+        key = self.cache_key(messages)
+        reply = self.cache.get(key)
+        if reply is not None:
+            return reply, True
+        reply = await self.complete(messages)
+        self.cache.set(key, reply)
+        return reply, False
+
+    async def stream_cached(self, messages: List[Dict]) -> AsyncIterator[str]:
+        """Như stream() nhưng dùng cache; chỉ lưu cache khi stream chạy hết"""
+        key = self.cache_key(messages)
+        reply = self.cache.get(key)
+        if reply is not None:
+            yield reply
+            return
+        parts = []
+        async for delta in self.stream(messages):
+            parts.append(delta)
+            yield delta
+        self.cache.set(key, "".join(parts))
+
+    async def complete(self, messages: List[Dict]) -> str:
+        """Gọi ChatGPT, trả về toàn bộ câu trả lời"""
+        with track_external("openai"):
+            response = await self.client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                max_tokens=512,
+                temperature=0.7
+            )
+        return response.choices[0].message.content or ""
+
+    async def stream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        """Gọi ChatGPT ở chế độ stream, yield từng đoạn text ngay khi nhận được"""
+        # Đo cả thời gian stream (tới chunk cuối), không chỉ lúc mở kết nối
+        with track_external("openai_stream"):
+            response = await self.client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                max_tokens=512,
+                temperature=0.7,
+                stream=True
+            )
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+
+chatgpt_service = ChatGPTService()
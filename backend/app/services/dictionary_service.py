@@ -1,10 +1,12 @@
-from typing import List
-from deep_translator import GoogleTranslator
+from typing import List, Optional
 from ..schemas import DictionaryResult
 from functools import lru_cache
+from sqlalchemy.orm import Session
+from .. import crud
+from . import google_clients
 from ..services.pronunciation import generate_pronunciation
-from pykakasi import kakasi
-
+from ..utils.circuit_breaker import CircuitBreakerError, translate_breaker
+from ..utils.metrics import track_external
 
 class DictionaryService:
     def __init__(self):
@@ -16,23 +18,53 @@ class DictionaryService:
             "KO": "ko"
         }
 
-        # Converter dùng cho tiếng Nhật: Kanji/Katakana -> Hiragana
-        self.kakasi = kakasi()
-        self.kakasi.setMode("J", "H")  # Kanji -> Hiragana
-        self.kakasi.setMode("K", "H")  # Katakana -> Hiragana
-        self.kakasi.setMode("H", "H")  # Hiragana giữ nguyên
-        self.kakasi_conv = self.kakasi.getConverter()
+        # Converter tiếng Nhật tạo lúc dùng lần đầu (xem kakasi_conv)
+        self._kakasi_conv = None
+
+    @property
+    def kakasi_conv(self):
+        """Converter dùng cho tiếng Nhật: Kanji/Katakana -> Hiragana"""
+        if self._kakasi_conv is None:
+            from pykakasi import kakasi
+            converter = kakasi()
+            converter.setMode("J", "H")  # Kanji -> Hiragana
+            converter.setMode("K", "H")  # Katakana -> Hiragana
+            converter.setMode("H", "H")  # Hiragana giữ nguyên
+            self._kakasi_conv = converter.getConverter()
+        return self._kakasi_conv
 
     @lru_cache(maxsize=1000)
     def _translate_cached(self, query: str, target_lang: str) -> str:
-        """Cache translations to avoid repeated API calls"""
+        """Cache translations to avoid repeated API calls (lỗi thì raise → không bị cache)"""
+        def translate():
+            # Chỉ đo lời gọi mạng thật (không tính lần bị circuit chặn)
+            with track_external("google_translate"):
+                return google_clients.translate_client.translate(query, 'vi', target_lang)
+
+        translated = translate_breaker.call(translate)
+        return translated if translated else query
+
+    def _translate(self, query: str, target_lang: str) -> Optional[str]:
+        """Bản dịch, hoặc None nếu Google Translate lỗi / circuit breaker đang mở"""
         try:
-            translator = GoogleTranslator(source='vi', target=target_lang)
-            translated = translator.translate(query)
-            return translated if translated else query
+            return self._translate_cached(query, target_lang)
+        except CircuitBreakerError as e:
+            print(f"Translation unavailable: {e}")
         except Exception as e:
             print(f"Translation error: {e}")
-            return query
+        return None
+
+    def _known_results(self, db: Session, query: str, language: str, limit: int) -> List[DictionaryResult]:
+        """Kết quả dự phòng: bản dịch đã có trong flashcard, pronunciation sinh local nếu thiếu"""
+        return [
+            DictionaryResult(
+                vietnamese=query,
+                pronunciation=pronunciation or generate_pronunciation(target, language),
+                target_language=target,
+                language=language
+            )
+            for target, pronunciation in crud.get_known_translations(db, query, language, limit)
+        ]
 
     def _has_kanji(self, text: str) -> bool:
         """Check if a Japanese string contains any Kanji (CJK Unified Ideographs)."""
@@ -64,7 +96,8 @@ class DictionaryService:
         query: str,
         language: str,
         limit: int = 10,
-        kanji_only: bool = False
+        kanji_only: bool = False,
+        db: Optional[Session] = None
     ) -> List[DictionaryResult]:
         """
         Search and translate Vietnamese to target language using Google Translate.
@@ -76,6 +109,8 @@ class DictionaryService:
                 * Nếu không có Kanji: giữ nguyên (Hiragana/Katakana)
             + kanji_only = True  -> hiển thị Kanji, và nếu không có Kanji thì bỏ kết quả
         - Các ngôn ngữ khác: giữ nguyên bản dịch Google Translate.
+        - Google Translate lỗi / circuit mở: trả bản dịch đã có trong flashcard (cần db),
+          không có thì trả list rỗng (trước đây trả lại chính query như một bản dịch).
         """
         results: List[DictionaryResult] = []
         target_lang = self.lang_map.get(language, "en")
@@ -89,7 +124,9 @@ class DictionaryService:
             return results
 
         # 1. Main translation duy nhất
-        translated = self._translate_cached(query, target_lang)
+        translated = self._translate(query, target_lang)
+        if translated is None:
+            return self._known_results(db, query, language, limit) if db is not None else results
 
         if translated:
             # Nếu tiếng Nhật và bật Kanji-only → bỏ mục không có Kanji
@@ -0,0 +1,128 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from .ai_example_generator import (
+    ExampleNotFoundError,
+    ExampleServiceError,
+    generate_dialogue,
+    generate_example_sentences,
+)
+
+# TTL cho entry có ví dụ / entry âm (không có ví dụ)
+EXAMPLE_CACHE_TTL = timedelta(days=int(os.getenv("EXAMPLE_CACHE_TTL_DAYS", "30")))
+EXAMPLE_CACHE_NEGATIVE_TTL = timedelta(hours=int(os.getenv("EXAMPLE_CACHE_NEGATIVE_TTL_HOURS", "24")))
+
+# Deck language code -> tên ngôn ngữ dùng cho generator
+LANGUAGE_NAMES = {
+    "EN": "English",
+    "ZH": "Chinese",
+    "JA": "Japanese",
+    "KO": "Korean"
+}
+
+
+def normalize_example_type(example_type: str) -> str:
+    """Chỉ có 2 loại: sentence | dialogue (giống logic cũ của router)"""
+    return "sentence" if example_type == "sentence" else "dialogue"
+
+
+def normalize_word(word: str) -> str:
+    """Chuẩn hoá key cache: bỏ khoảng trắng thừa, không phân biệt hoa thường"""
+    return " ".join((word or "").split()).lower()
+
+
+def _is_fresh(entry: models.ExampleCache) -> bool:
+    expires_at = entry.expires_at
+    # SQLite trả về naive datetime → coi là UTC
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at > datetime.now(timezone.utc)
+
+
+def _generate(flashcard: models.Flashcard, language_name: str, example_type: str) -> List[Dict]:
+    generator = generate_example_sentences if example_type == "sentence" else generate_dialogue
+    return generator(
+        flashcard.vietnamese,
+        flashcard.target_language,
+        flashcard.pronunciation,
+        language_name
+    )
+
+
+def _write_cache(db: Session, word: str, language: str, example_type: str, examples, ttl: timedelta):
+    try:
+        crud.upsert_example_cache(
+            db, word, language, example_type, examples,
+            expires_at=datetime.now(timezone.utc) + ttl
+        )
+    except IntegrityError:
+        # Request khác vừa ghi cùng key → bỏ qua, entry của họ cũng đúng
+        db.rollback()
+
+
+def _save_for_flashcard(db: Session, flashcard_id: int, example_type: str, examples):
+    try:
+        crud.save_flashcard_examples(db, flashcard_id, example_type, examples)
+    except IntegrityError:
+        db.rollback()
+
+
+def get_or_generate_examples(
+    db: Session,
+    flashcard: models.Flashcard,
+    deck_language: str,
+    example_type: str,
+    before_fetch: Optional[Callable[[], None]] = None
+) -> Tuple[List[Dict], bool]:
+    """
+    Lấy ví dụ cho flashcard theo thứ tự:
+    1. Ví dụ đã lưu cho chính flashcard này
+    2. Cache chung theo (word, language, type) còn hạn - kể cả entry âm
+    3. Gọi Tatoeba rồi ghi vào cả 2 nơi (before_fetch được gọi ngay trước đó, vd. rate limit)
+    4. Tatoeba lỗi / circuit breaker mở → dùng entry cache đã hết hạn nếu có (giá trị cuối cùng biết được)
+
+    Returns:
+        (examples, cached) - cached=True nếu không phải gọi Tatoeba
+
+    Raises:
+        ExampleNotFoundError: không có ví dụ (từ Tatoeba hoặc từ entry âm)
+        ExampleServiceError: Tatoeba lỗi và không có entry cache cũ (ExampleServiceUnavailable nếu breaker mở)
+    """
+    example_type = normalize_example_type(example_type)
+
+    stored = crud.get_flashcard_examples(db, flashcard.id, example_type)
+    if stored is not None:
+        return stored.examples, True
+
+    word = normalize_word(flashcard.target_language)
+    entry = crud.get_example_cache(db, word, deck_language, example_type)
+    if entry is not None and _is_fresh(entry):
+        if entry.not_found:
+            raise ExampleNotFoundError(f"No examples found in Tatoeba for: {flashcard.target_language}")
+        _save_for_flashcard(db, flashcard.id, example_type, entry.examples)
+        return entry.examples, True
+
+    language_name = LANGUAGE_NAMES.get(deck_language, "English")
+    if before_fetch is not None:
+        before_fetch()
+    try:
+        examples = _generate(flashcard, language_name, example_type)
+    except ExampleNotFoundError:
+        _write_cache(db, word, deck_language, example_type, None, EXAMPLE_CACHE_NEGATIVE_TTL)
+        raise
+    except ExampleServiceError:
+        if entry is None:
+            raise
+        # Entry hết hạn vẫn tốt hơn lỗi; không gia hạn → lần sau Tatoeba ổn sẽ làm mới
+        if entry.not_found:
+            raise ExampleNotFoundError(f"No examples found in Tatoeba for: {flashcard.target_language}")
+        return entry.examples, True
+
+    _write_cache(db, word, deck_language, example_type, examples, EXAMPLE_CACHE_TTL)
+    _save_for_flashcard(db, flashcard.id, example_type, examples)
+    return examples, False
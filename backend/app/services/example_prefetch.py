@@ -0,0 +1,150 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from ..database import SessionLocal
+from ..utils.circuit_breaker import CircuitOpenError
+from ..utils.rate_limit import RateLimiter
+from .ai_example_generator import ExampleNotFoundError, ExampleServiceError
+from .example_cache import get_or_generate_examples
+
+logger = logging.getLogger(__name__)
+
+# Số flashcard xử lý song song / số request Tatoeba tối đa mỗi giây / số lần retry khi Tatoeba lỗi
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+PREFETCH_RATE_PER_SEC = float(os.getenv("PREFETCH_RATE_PER_SEC", "2"))
+PREFETCH_MAX_RETRIES = int(os.getenv("PREFETCH_MAX_RETRIES", "3"))
+PREFETCH_RETRY_BACKOFF = float(os.getenv("PREFETCH_RETRY_BACKOFF", "1.0"))
+# Job pending/running không có tiến độ quá N giây → coi như chết (process restart), cho tạo job mới
+PREFETCH_STALE_SECONDS = int(os.getenv("PREFETCH_STALE_SECONDS", "600"))
+
+EXAMPLE_TYPES = ("sentence", "dialogue")
+
+# Dùng chung cho mọi job trong process → tổng tốc độ gọi Tatoeba bị giới hạn
+_tatoeba_limiter = RateLimiter(PREFETCH_RATE_PER_SEC)
+
+
+def parse_example_types(value: str) -> List[str]:
+    """"all" | "sentence" | "dialogue" | "sentence,dialogue" -> list hợp lệ"""
+    if not value or value == "all":
+        return list(EXAMPLE_TYPES)
+    types = [t.strip() for t in value.split(",") if t.strip() in EXAMPLE_TYPES]
+    return list(dict.fromkeys(types))
+
+
+def _prefetch_one(flashcard_id: int, deck_language: str, example_type: str) -> bool:
+    """Tải ví dụ cho 1 (flashcard, type), có retry + backoff. Trả về False nếu thất bại"""
+    db = SessionLocal()
+    try:
+        flashcard = crud.get_flashcard(db, flashcard_id)
+        if flashcard is None:
+            return True  # flashcard bị xóa trong lúc chạy job
+
+        for attempt in range(PREFETCH_MAX_RETRIES + 1):
+            try:
+                get_or_generate_examples(
+                    db, flashcard, deck_language, example_type,
+                    before_fetch=_tatoeba_limiter.wait
+                )
+                return True
+            except ExampleNotFoundError:
+                return True  # không có ví dụ → đã cache âm, không phải lỗi
+            except ExampleServiceError as e:
+                if isinstance(e.__cause__, CircuitOpenError):
+                    # Circuit mở lâu hơn tổng thời gian backoff → retry vô ích
+                    logger.warning(f"Prefetch skipped for flashcard {flashcard_id} ({example_type}): {e}")
+                    return False
+                # Lỗi mạng / 1 lần quá timeout budget (CallTimeoutError) → retry với backoff
+                if attempt == PREFETCH_MAX_RETRIES:
+                    logger.warning(f"Prefetch failed for flashcard {flashcard_id} ({example_type}): {e}")
+                    return False
+                time.sleep(PREFETCH_RETRY_BACKOFF * (2 ** attempt))
+        return False
+    except Exception as e:
+        logger.error(f"Prefetch error for flashcard {flashcard_id} ({example_type}): {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def start_prefetch_job(db: Session, deck_id: int, example_types: List[str]) -> Tuple[models.ExamplePrefetchJob, bool]:
+    """
+    Trả về (job, created): job đang chạy của deck nếu có, ngược lại tạo job mới.
+    Job không có heartbeat quá PREFETCH_STALE_SECONDS bị đánh dấu failed trước
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=PREFETCH_STALE_SECONDS)
+    if crud.fail_stale_prefetch_jobs(db, deck_id, stale_before):
+        logger.warning(f"Prefetch: marked stalled job(s) of deck {deck_id} as failed")
+
+    job = crud.create_prefetch_job(db, deck_id, ",".join(example_types))
+    if job is not None:
+        return job, True
+    return crud.get_latest_prefetch_job(db, deck_id), False
+
+
+def run_prefetch_job(job_id: int):
+    """
+    Chạy job tải trước ví dụ cho cả deck (gọi từ BackgroundTasks).
+    Bỏ qua flashcard đã có ví dụ lưu sẵn, cập nhật tiến độ + heartbeat vào DB sau mỗi flashcard;
+    dừng nếu job đã bị đánh dấu stale trong lúc chạy.
+    """
+    db = SessionLocal()
+    try:
+        job = crud.get_prefetch_job(db, job_id)
+        if job is None or job.status != "pending":
+            return
+
+        deck = crud.get_deck(db, job.deck_id)
+        example_types = parse_example_types(job.example_types)
+        existing = crud.get_flashcard_example_keys(db, job.deck_id)
+        card_ids = [fc.id for fc in crud.get_flashcards_by_deck(db, job.deck_id)]
+        tasks = [
+            (card_id, example_type)
+            for card_id in card_ids
+            for example_type in example_types
+            if (card_id, example_type) not in existing
+        ]
+
+        now = datetime.now(timezone.utc)
+        job.status = "running"
+        job.total = len(tasks)
+        job.started_at = now
+        job.updated_at = now
+        db.commit()
+
+        with ThreadPoolExecutor(max_workers=max(1, PREFETCH_CONCURRENCY)) as executor:
+            futures = [
+                executor.submit(_prefetch_one, card_id, deck.language, example_type)
+                for card_id, example_type in tasks
+            ]
+            for future in as_completed(futures):
+                if not crud.record_prefetch_progress(db, job_id, future.result()):
+                    logger.warning(f"Prefetch job {job_id} is no longer running, stopping")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return
+
+        job = crud.get_prefetch_job(db, job_id)
+        if job.status == "running":
+            job.status = "completed"
+            job.finished_at = job.updated_at = datetime.now(timezone.utc)
+            db.commit()
+            logger.info(f"Prefetch job {job_id}: {job.completed}/{job.total} done, {job.failed} failed")
+
+    except Exception as e:
+        logger.error(f"Prefetch job {job_id} crashed: {e}")
+        db.rollback()
+        job = crud.get_prefetch_job(db, job_id)
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = job.updated_at = datetime.now(timezone.utc)
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,66 @@
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from ..utils.content_hash import flashcard_content_hash
+from .pronunciation import generate_pronunciation
+
+# skip : bỏ thẻ trùng (đã có trong deck hoặc lặp lại trong file)
+# merge: như skip, nhưng cập nhật pronunciation của thẻ đã có nếu file có giá trị mới
+# keep : import tất cả như trước đây
+DUPLICATE_MODES = ("skip", "merge", "keep")
+
+
+def import_flashcards(
+    db: Session,
+    deck: models.Deck,
+    rows: List[Dict[str, str]],
+    on_duplicate: str = "skip"
+) -> dict:
+    """
+    Import nhiều flashcard vào deck, phát hiện trùng theo content_hash.
+
+    Trùng được lọc theo tập hợp: 1 lượt tra các hash của file trên index
+    (deck_id, content_hash) thay vì tra từng dòng; pronunciation chỉ được
+    sinh cho các thẻ thực sự được tạo.
+
+    Returns:
+        {"created": [...Flashcard], "skipped": int, "merged": int}
+    """
+    for row in rows:
+        row["content_hash"] = flashcard_content_hash(row["vietnamese"], row["target_language"])
+
+    if on_duplicate == "keep":
+        new_rows, existing = rows, {}
+        skipped = 0
+    else:
+        # Trùng ngay trong file → giữ dòng đầu
+        unique = {}
+        for row in rows:
+            unique.setdefault(row["content_hash"], row)
+        existing = crud.get_flashcard_ids_by_content_hash(db, deck.id, unique.keys())
+        new_rows = [row for content_hash, row in unique.items() if content_hash not in existing]
+        skipped = len(rows) - len(new_rows)
+
+    # Merge + tạo mới trong 1 transaction: create_flashcards_bulk commit cả 2, lỗi → rollback cả 2
+    merged = 0
+    if on_duplicate == "merge" and existing:
+        merged = crud.merge_flashcard_pronunciations(db, deck.id, {
+            existing[content_hash]: row["pronunciation"]
+            for content_hash, row in unique.items()
+            if content_hash in existing and row.get("pronunciation")
+        })
+        if merged:
+            crud.bump_deck_version(db, deck.id)
+
+    for row in new_rows:
+        if not row.get("pronunciation"):
+            row["pronunciation"] = generate_pronunciation(row["target_language"], deck.language)
+
+    if new_rows:
+        created = crud.create_flashcards_bulk(db, deck.id, new_rows)
+    else:
+        created = []
+        db.commit()
+    return {"created": created, "skipped": skipped - merged, "merged": merged}
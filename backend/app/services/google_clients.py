@@ -0,0 +1,83 @@
+"""
+Adapter cho 2 thư viện gọi endpoint Google không chính thức: gTTS (đọc) và deep_translator (dịch).
+
+Đây là chỗ duy nhất đụng tới API nội bộ của 2 thư viện (timeout mặc định, đổi base URL
+sang server giả) → chỉ đúng với version pin trong requirements.txt. Nâng version mà thuộc
+tính nội bộ bị đổi tên thì raise ExternalClientError ngay lúc patch, không lặng lẽ gọi Google thật.
+
+Service gọi qua biến module (google_clients.tts_client / translate_client) lúc dùng,
+benchmark / test thay bằng client giả:
+
+    google_clients.tts_client = FakeTTSClient()
+"""
+import os
+from typing import Optional
+
+from ..utils.circuit_breaker import translate_breaker, tts_breaker
+from ..utils.http_timeout import inject_default_timeout
+
+
+class ExternalClientError(RuntimeError):
+    """Thư viện ngoài không còn thuộc tính nội bộ mà adapter cần (thường do nâng version)"""
+
+
+def require_attr(obj, name: str, library: str):
+    if not hasattr(obj, name):
+        raise ExternalClientError(
+            f"{library}: không còn thuộc tính nội bộ {name!r}, kiểm tra version pin trong requirements.txt"
+        )
+    return getattr(obj, name)
+
+
+class GTTSClient:
+    """Ghi file mp3 bằng gTTS; base_url (server giả) thay cho https://translate.google.com"""
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url.rstrip("/") if base_url else None
+
+    def synthesize(self, text: str, lang_code: str, path: str) -> None:
+        # import lúc dùng lần đầu, không tốn lúc khởi động app
+        import gtts.tts
+        from gtts import gTTS
+
+        # gTTS không nhận timeout → socket timeout mặc định = budget của breaker, thread không treo mãi
+        require_attr(gtts.tts, "requests", "gTTS")
+        inject_default_timeout(gtts.tts, tts_breaker.call_timeout)
+        tts = gTTS(text=text, lang=lang_code, slow=False)
+        if self.base_url:
+            prepare_requests = require_attr(tts, "_prepare_requests", "gTTS")
+            base_url = self.base_url
+
+            def prepare_with_base_url():
+                prepared = prepare_requests()
+                for request in prepared:
+                    request.prepare_url(base_url + request.path_url, None)
+                return prepared
+
+            tts._prepare_requests = prepare_with_base_url
+        tts.save(path)
+
+
+class GoogleTranslateClient:
+    """Dịch bằng deep_translator.GoogleTranslator; base_url thay cho https://translate.google.com/m"""
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url
+
+    def translate(self, text: str, source: str, target: str) -> Optional[str]:
+        import deep_translator.google
+        from deep_translator import GoogleTranslator
+
+        # deep_translator gọi requests.get không timeout → dùng budget của breaker làm socket timeout
+        require_attr(deep_translator.google, "requests", "deep_translator")
+        inject_default_timeout(deep_translator.google, translate_breaker.call_timeout)
+        translator = GoogleTranslator(source=source, target=target)
+        if self.base_url:
+            require_attr(translator, "_base_url", "deep_translator")
+            translator._base_url = self.base_url
+        return translator.translate(text)
+
+
+# Đổi được sang server giả khi test qua env
+tts_client = GTTSClient(os.getenv("GTTS_BASE_URL"))
+translate_client = GoogleTranslateClient(os.getenv("GOOGLE_TRANSLATE_URL"))
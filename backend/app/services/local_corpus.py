@@ -0,0 +1,209 @@
+"""
+Kho câu ví dụ offline (Tatoeba dump) dùng SQLite FTS5.
+
+Nạp file "sentence pairs" TSV tải từ https://tatoeba.org/downloads
+(mỗi dòng: src_id <TAB> src_text <TAB> trans_id <TAB> trans_text):
+
+    python -m app.services.local_corpus load jpn-vie.tsv --from jpn --to vie
+
+Sau đó set EXAMPLE_BACKEND=local để generate_example_sentences / generate_dialogue
+tra cứu local thay vì gọi API Tatoeba.
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Tuple
+
+LOCAL_CORPUS_PATH = os.getenv("LOCAL_CORPUS_PATH", "./data/tatoeba_corpus.db")
+
+# FTS5 trigram: tách được CJK (không có khoảng trắng), cần SQLite >= 3.34
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS examples (
+    id INTEGER PRIMARY KEY,
+    sentence_id INTEGER NOT NULL,
+    lang TEXT NOT NULL,
+    text TEXT NOT NULL,
+    trans_lang TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    UNIQUE (sentence_id, trans_lang)
+);
+CREATE INDEX IF NOT EXISTS ix_examples_lang ON examples (lang, trans_lang);
+CREATE VIRTUAL TABLE IF NOT EXISTS examples_fts USING fts5(
+    text,
+    content='examples',
+    content_rowid='id',
+    tokenize='trigram'
+);
+"""
+
+_local = threading.local()
+
+
+class LocalCorpusUnavailable(Exception):
+    """Chưa nạp corpus (không có file DB)"""
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Mỗi thread giữ 1 connection read-only tới corpus"""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        if not os.path.exists(db_path):
+            raise LocalCorpusUnavailable(f"Local corpus not found: {db_path}")
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conns[db_path] = conn
+    return conn
+
+
+def _escape_fts(word: str) -> str:
+    """Bọc từ khoá thành 1 phrase FTS5 (tránh cú pháp AND/OR/NEAR, dấu ngoặc...)"""
+    return '"' + word.replace('"', '""') + '"'
+
+
+def search_local_corpus(
+    word: str,
+    from_lang: str,
+    to_lang: str = "vie",
+    limit: int = 10,
+    db_path: str = None
+) -> List[Dict]:
+    """
+    Tìm câu ví dụ trong corpus local, trả về cùng format với search_tatoeba:
+    [{"target": ..., "vietnamese": ..., "id": ...}]
+    """
+    word = word.strip()
+    if not word:
+        return []
+
+    conn = _connect(db_path or LOCAL_CORPUS_PATH)
+
+    if len(word) >= 3:
+        # Trigram index: MATCH + xếp hạng bm25
+        rows = conn.execute(
+            """
+            SELECT e.sentence_id, e.text, e.translation
+            FROM examples_fts f
+            JOIN examples e ON e.id = f.rowid
+            WHERE examples_fts MATCH ? AND e.lang = ? AND e.trans_lang = ?
+            ORDER BY f.rank, length(e.text)
+            LIMIT ?
+            """,
+            (_escape_fts(word), from_lang, to_lang, limit),
+        ).fetchall()
+    else:
+        # Trigram không index được chuỗi < 3 ký tự (vd. 水, 나) → LIKE, dừng sớm nhờ LIMIT
+        pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rows = conn.execute(
+            """
+            SELECT sentence_id, text, translation
+            FROM examples
+            WHERE lang = ? AND trans_lang = ? AND text LIKE ? ESCAPE '\\'
+            LIMIT ?
+            """,
+            (from_lang, to_lang, pattern, limit),
+        ).fetchall()
+
+    return [
+        {"target": text, "vietnamese": translation, "id": sentence_id}
+        for sentence_id, text, translation in rows
+    ]
+
+
+def _iter_pairs(path: str) -> Iterator[Tuple[int, str, str]]:
+    """Đọc từng dòng file pairs TSV (không load cả file vào RAM)"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 4 or not parts[0].isdigit():
+                continue
+            text, translation = parts[1].strip(), parts[3].strip()
+            if text and translation:
+                yield int(parts[0]), text, translation
+
+
+def load_tatoeba_pairs(
+    path: str,
+    from_lang: str,
+    to_lang: str = "vie",
+    db_path: str = None,
+    batch_size: int = 10000
+) -> int:
+    """
+    Nạp file sentence pairs vào corpus local, trả về số câu đã thêm.
+
+    - Insert theo batch (executemany) trong 1 transaction
+    - Câu có nhiều bản dịch: giữ bản dịch đầu tiên
+    - Rebuild FTS index 1 lần ở cuối (nhanh hơn cập nhật từng dòng)
+    """
+    db_path = db_path or LOCAL_CORPUS_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+
+        before = conn.execute("SELECT COUNT(*) FROM examples").fetchone()[0]
+        insert_sql = (
+            "INSERT OR IGNORE INTO examples (sentence_id, lang, text, trans_lang, translation) "
+            "VALUES (?, ?, ?, ?, ?)"
+        )
+
+        batch = []
+        with conn:
+            for sentence_id, text, translation in _iter_pairs(path):
+                batch.append((sentence_id, from_lang, text, to_lang, translation))
+                if len(batch) >= batch_size:
+                    conn.executemany(insert_sql, batch)
+                    batch.clear()
+            if batch:
+                conn.executemany(insert_sql, batch)
+
+            conn.execute("INSERT INTO examples_fts(examples_fts) VALUES ('rebuild')")
+
+        after = conn.execute("SELECT COUNT(*) FROM examples").fetchone()[0]
+        conn.execute("PRAGMA optimize")
+        return after - before
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Tatoeba example corpus")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    load = sub.add_parser("load", help="Nạp file sentence pairs TSV")
+    load.add_argument("path")
+    load.add_argument("--from", dest="from_lang", required=True, help="cmn | jpn | kor | eng")
+    load.add_argument("--to", dest="to_lang", default="vie")
+    load.add_argument("--db", dest="db_path", default=LOCAL_CORPUS_PATH)
+    load.add_argument("--batch-size", type=int, default=10000)
+
+    search = sub.add_parser("search", help="Tra thử 1 từ")
+    search.add_argument("word")
+    search.add_argument("--from", dest="from_lang", required=True)
+    search.add_argument("--to", dest="to_lang", default="vie")
+    search.add_argument("--db", dest="db_path", default=LOCAL_CORPUS_PATH)
+    search.add_argument("--limit", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.command == "load":
+        start = time.perf_counter()
+        count = load_tatoeba_pairs(args.path, args.from_lang, args.to_lang, args.db_path, args.batch_size)
+        print(f"✅ Loaded {count} sentences into {args.db_path} in {time.perf_counter() - start:.1f}s")
+    else:
+        start = time.perf_counter()
+        results = search_local_corpus(args.word, args.from_lang, args.to_lang, args.limit, args.db_path)
+        for r in results:
+            print(f"[{r['id']}] {r['target']}  →  {r['vietnamese']}")
+        print(f"🔍 {len(results)} results in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
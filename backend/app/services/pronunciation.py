@@ -1,29 +1,41 @@
-from pypinyin import pinyin, Style
-import pykakasi
-from hangul_romanize import Transliter
-from hangul_romanize.rule import academic
+from functools import lru_cache
+
+
+# Converter khởi tạo 1 lần cho cả process (kakasi() mất ~20ms mỗi lần tạo).
+# Import thư viện bên trong hàm → chỉ tốn lúc dùng lần đầu, không tốn lúc khởi động app
+@lru_cache(maxsize=None)
+def get_kakasi():
+    import pykakasi
+    return pykakasi.kakasi()
+
+
+@lru_cache(maxsize=None)
+def get_hangul_transliter():
+    from hangul_romanize import Transliter
+    from hangul_romanize.rule import academic
+    return Transliter(academic)
+
 
 def generate_pronunciation(text: str, language: str) -> str:
     """Auto-generate pronunciation based on language"""
-    
+
     try:
         if language == "ZH":  # Chinese - Pinyin
+            from pypinyin import pinyin, Style
             result = pinyin(text, style=Style.TONE)
             return ' '.join([item[0] for item in result])
-        
+
         elif language == "JA":  # Japanese - Romaji
-            kks = pykakasi.kakasi()
-            result = kks.convert(text)
+            result = get_kakasi().convert(text)
             return ' '.join([item['hepburn'] for item in result])
-        
+
         elif language == "KO":  # Korean - Romanization
-            transliter = Transliter(academic)
-            return transliter.translit(text)
-        
+            return get_hangul_transliter().translit(text)
+
         elif language == "EN":  # English - no pronunciation needed
             return text
     except Exception as e:
         print(f"Pronunciation generation error: {e}")
         return text
-    
-    return text
\ No newline at end of file
+
+    return text
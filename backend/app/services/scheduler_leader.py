@@ -0,0 +1,158 @@
+"""
+Chọn 1 process leader cho job định kỳ khi chạy nhiều worker / replica.
+
+Mọi process vẫn start BackgroundScheduler, nhưng job bọc bởi leader_job() chỉ
+chạy ở process đang giữ lock:
+- Postgres: pg_try_advisory_lock trên 1 connection giữ riêng (connection chết → lock tự nhả)
+- SQLite / khác: lease trong bảng scheduler_locks, gia hạn mỗi heartbeat, hết hạn sau TTL
+
+Mỗi lần chạy job được ghi vào bảng job_runs (thời gian, trạng thái, lỗi).
+"""
+import functools
+import logging
+import os
+import socket
+import threading
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, or_, text, update
+from sqlalchemy.engine import Engine
+
+from .. import crud, models
+from ..database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LOCK_NAME = os.getenv("SCHEDULER_LOCK_NAME", "flashcard-scheduler")
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "60"))
+SCHEDULER_HEARTBEAT_SECONDS = int(os.getenv("SCHEDULER_HEARTBEAT_SECONDS", "20"))
+JOB_RUN_RETENTION_DAYS = int(os.getenv("JOB_RUN_RETENTION_DAYS", "30"))
+
+
+class LeaderElection:
+    def __init__(self, engine: Engine, name: str = SCHEDULER_LOCK_NAME):
+        self.engine = engine
+        self.name = name
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._lock = threading.Lock()
+        self._pg_connection = None  # Postgres: connection giữ advisory lock
+
+    @property
+    def _advisory_key(self) -> int:
+        return zlib.crc32(self.name.encode("utf-8"))
+
+    def heartbeat(self) -> bool:
+        """Giành / gia hạn quyền leader; gọi lúc startup và định kỳ. Trả về is_leader"""
+        with self._lock:
+            was_leader = self.is_leader
+            try:
+                if self.engine.dialect.name == "postgresql":
+                    self.is_leader = self._heartbeat_advisory()
+                else:
+                    self.is_leader = self._heartbeat_lease()
+            except Exception as e:
+                logger.error(f"Scheduler leader heartbeat failed: {e}")
+                self.is_leader = False
+            if self.is_leader != was_leader:
+                logger.info(f"Scheduler leader {'acquired' if self.is_leader else 'lost'} by {self.owner}")
+            return self.is_leader
+
+    def _heartbeat_advisory(self) -> bool:
+        if self._pg_connection is not None:
+            try:
+                self._pg_connection.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                self._close_pg_connection()
+        # AUTOCOMMIT: giữ connection lâu mà không để transaction "idle in transaction"
+        connection = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": self._advisory_key}
+        ).scalar()
+        if acquired:
+            self._pg_connection = connection
+            return True
+        connection.close()
+        return False
+
+    def _close_pg_connection(self):
+        try:
+            self._pg_connection.close()
+        except Exception:
+            pass
+        self._pg_connection = None
+
+    def _heartbeat_lease(self) -> bool:
+        table = models.SchedulerLock.__table__
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=SCHEDULER_LEASE_SECONDS)
+        with self.engine.begin() as conn:
+            # Gia hạn nếu đang giữ lock, hoặc chiếm lock đã hết hạn
+            result = conn.execute(
+                update(table)
+                .where(table.c.name == self.name)
+                .where(or_(table.c.owner == self.owner, table.c.expires_at < now))
+                .values(owner=self.owner, expires_at=expires_at)
+            )
+            if result.rowcount:
+                return True
+            exists = conn.execute(table.select().where(table.c.name == self.name)).first()
+            if exists is not None:
+                return False
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(table).values(name=self.name, owner=self.owner, expires_at=expires_at))
+            return True
+        except Exception:
+            # Process khác vừa insert trước (PK trùng)
+            return False
+
+    def release(self):
+        """Nhả lock lúc shutdown để process khác lên leader ngay, không phải chờ hết lease"""
+        with self._lock:
+            if not self.is_leader:
+                return
+            try:
+                if self._pg_connection is not None:
+                    self._pg_connection.execute(
+                        text("SELECT pg_advisory_unlock(:key)"), {"key": self._advisory_key}
+                    )
+                    self._close_pg_connection()
+                else:
+                    table = models.SchedulerLock.__table__
+                    with self.engine.begin() as conn:
+                        conn.execute(
+                            table.delete().where(table.c.name == self.name).where(table.c.owner == self.owner)
+                        )
+            except Exception as e:
+                logger.warning(f"Could not release scheduler lock: {e}")
+            self.is_leader = False
+
+
+def leader_job(election: LeaderElection, job_id: str, func):
+    """Bọc job: bỏ qua nếu process không phải leader, ghi lịch sử vào job_runs"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not election.is_leader:
+            return None
+
+        db = SessionLocal()
+        try:
+            run = crud.create_job_run(db, job_id, election.owner)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                db.rollback()
+                crud.finish_job_run(db, run, "failed", error=str(e)[:2000])
+                logger.error(f"Scheduled job {job_id} failed: {e}")
+                return None
+            crud.finish_job_run(db, run, "success")
+            return result
+        finally:
+            db.close()
+
+    return wrapper
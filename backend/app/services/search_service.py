@@ -0,0 +1,198 @@
+"""
+Tìm kiếm full-text trên flashcard của 1 user (vietnamese, target_language, pronunciation).
+
+- SQLite  : bảng ảo FTS5 (tokenizer trigram - khớp được CJK không có khoảng trắng),
+            đồng bộ bằng trigger trên bảng flashcards
+- Postgres: index GIN pg_trgm trên biểu thức ghép 3 cột (Postgres tự đồng bộ index)
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Trigram cần >= 3 ký tự; term ngắn hơn → fallback LIKE
+MIN_TRIGRAM_LENGTH = 3
+
+# Index tìm kiếm đã có chưa (FTS5 / pg_trgm); None = chưa kiểm tra trong process này
+_index_available: Optional[bool] = None
+
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(
+        vietnamese, target_language, pronunciation,
+        content='flashcards', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flashcards_fts_ai AFTER INSERT ON flashcards BEGIN
+        INSERT INTO flashcards_fts(rowid, vietnamese, target_language, pronunciation)
+        VALUES (new.id, new.vietnamese, new.target_language, new.pronunciation);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flashcards_fts_ad AFTER DELETE ON flashcards BEGIN
+        INSERT INTO flashcards_fts(flashcards_fts, rowid, vietnamese, target_language, pronunciation)
+        VALUES ('delete', old.id, old.vietnamese, old.target_language, old.pronunciation);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flashcards_fts_au AFTER UPDATE OF vietnamese, target_language, pronunciation ON flashcards BEGIN
+        INSERT INTO flashcards_fts(flashcards_fts, rowid, vietnamese, target_language, pronunciation)
+        VALUES ('delete', old.id, old.vietnamese, old.target_language, old.pronunciation);
+        INSERT INTO flashcards_fts(rowid, vietnamese, target_language, pronunciation)
+        VALUES (new.id, new.vietnamese, new.target_language, new.pronunciation);
+    END
+    """,
+]
+
+# Biểu thức phải giống hệt trong index và trong câu query thì Postgres mới dùng index
+PG_SEARCH_EXPR = "(f.vietnamese || ' ' || f.target_language || ' ' || coalesce(f.pronunciation, ''))"
+PG_INDEX_EXPR = "(vietnamese || ' ' || target_language || ' ' || coalesce(pronunciation, ''))"
+
+PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_flashcards_search_trgm ON flashcards USING gin ({PG_INDEX_EXPR} gin_trgm_ops)",
+]
+
+
+def _index_exists(conn, dialect: str) -> bool:
+    if dialect == "sqlite":
+        return conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'flashcards_fts'"
+        )).first() is not None
+    if dialect == "postgresql":
+        # similarity() cần extension pg_trgm
+        return conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+    return False
+
+
+def search_index_available(db: Session) -> bool:
+    """
+    True nếu dùng được FTS5 (SQLite) / pg_trgm (Postgres). Kết quả True được nhớ trong process;
+    chưa có thì kiểm tra lại mỗi lần (1 query catalog) → index tạo sau (python -m app.migrations) vẫn được dùng
+    """
+    global _index_available
+    if not _index_available:
+        _index_available = _index_exists(db, db.bind.dialect.name)
+    return _index_available
+
+
+def ensure_search_index(engine: Engine):
+    """Tạo index tìm kiếm nếu chưa có (idempotent, gọi lúc khởi động sau create_all)"""
+    global _index_available
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'flashcards_fts'"
+                )).first()
+                for ddl in SQLITE_FTS_DDL:
+                    conn.execute(text(ddl))
+                if not exists:
+                    # Lần đầu: index toàn bộ flashcard đã có
+                    conn.execute(text("INSERT INTO flashcards_fts(flashcards_fts) VALUES ('rebuild')"))
+            elif dialect == "postgresql":
+                for ddl in PG_DDL:
+                    conn.execute(text(ddl))
+        with engine.connect() as conn:
+            _index_available = _index_exists(conn, dialect)
+    except Exception as e:
+        # Thiếu FTS5 / không có quyền CREATE EXTENSION → search vẫn chạy bằng LIKE
+        logger.warning(f"Could not create flashcard search index ({dialect}): {e}")
+        _index_available = False
+
+
+def _fts_query(query: str) -> Optional[str]:
+    """Mỗi term thành 1 phrase FTS5 (AND ngầm định); None nếu có term quá ngắn cho trigram"""
+    terms = query.split()
+    if not terms or any(len(term) < MIN_TRIGRAM_LENGTH for term in terms):
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+SELECT_COLUMNS = """
+    f.id, f.deck_id, f.vietnamese, f.pronunciation, f.target_language, f.created_at, f.updated_at,
+    d.name AS deck_name
+"""
+
+
+def search_user_flashcards(
+    db: Session,
+    user_id: int,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    deck_id: Optional[int] = None
+) -> dict:
+    """
+    Tìm flashcard trong tất cả deck của user, xếp hạng theo độ liên quan.
+    Lấy limit + 1 dòng để biết còn trang sau (không cần COUNT toàn bộ).
+    """
+    query = " ".join(query.split())
+    params = {
+        "user_id": user_id,
+        "deck_id": deck_id,
+        "limit": limit + 1,
+        "offset": offset,
+        "pattern": _like_pattern(query),
+        "q": query,
+    }
+    deck_filter = "AND d.id = :deck_id" if deck_id is not None else ""
+    dialect = db.bind.dialect.name
+    indexed = search_index_available(db)
+    fts_query = _fts_query(query) if dialect == "sqlite" and indexed else None
+
+    if fts_query is not None:
+        params["match"] = fts_query
+        sql = f"""
+            SELECT {SELECT_COLUMNS}, -bm25(flashcards_fts) AS score
+            FROM flashcards_fts
+            JOIN flashcards f ON f.id = flashcards_fts.rowid
+            JOIN decks d ON d.id = f.deck_id
+            WHERE flashcards_fts MATCH :match AND d.user_id = :user_id {deck_filter}
+            ORDER BY bm25(flashcards_fts), f.id
+            LIMIT :limit OFFSET :offset
+        """
+    elif dialect == "postgresql" and indexed:
+        sql = f"""
+            SELECT {SELECT_COLUMNS}, similarity({PG_SEARCH_EXPR}, :q) AS score
+            FROM flashcards f
+            JOIN decks d ON d.id = f.deck_id
+            WHERE {PG_SEARCH_EXPR} ILIKE :pattern ESCAPE '\\' AND d.user_id = :user_id {deck_filter}
+            ORDER BY score DESC, f.id
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        # Term < 3 ký tự hoặc chưa có index: LIKE trong phạm vi deck của user,
+        # ưu tiên khớp chính xác / chuỗi ngắn
+        sql = f"""
+            SELECT {SELECT_COLUMNS},
+                CASE WHEN f.vietnamese = :q OR f.target_language = :q THEN 1.0
+                     ELSE 1.0 / (1 + length(f.vietnamese) + length(f.target_language)) END AS score
+            FROM flashcards f
+            JOIN decks d ON d.id = f.deck_id
+            WHERE d.user_id = :user_id {deck_filter}
+              AND (f.vietnamese LIKE :pattern ESCAPE '\\'
+                   OR f.target_language LIKE :pattern ESCAPE '\\'
+                   OR f.pronunciation LIKE :pattern ESCAPE '\\')
+            ORDER BY score DESC, f.id
+            LIMIT :limit OFFSET :offset
+        """
+
+    rows = db.execute(text(sql), params).mappings().all()
+    return {
+        "items": [dict(row) for row in rows[:limit]],
+        "limit": limit,
+        "offset": offset,
+        "has_more": len(rows) > limit,
+    }
@@ -0,0 +1,178 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models, schemas
+
+MIN_EASE = 1.3
+
+
+def apply_sm2(state: models.ReviewState, quality: int, now: datetime = None) -> models.ReviewState:
+    """
+    Cập nhật state theo thuật toán SM-2 (quality 0-5)
+    - quality < 3: quên → học lại từ đầu, ôn lại sau 1 ngày
+    - quality >= 3: interval 1 → 6 → interval * ease
+    """
+    now = now or datetime.now(timezone.utc)
+
+    if quality < 3:
+        state.repetitions = 0
+        state.interval_days = 1
+        state.lapses = (state.lapses or 0) + 1
+    else:
+        if state.repetitions == 0:
+            state.interval_days = 1
+        elif state.repetitions == 1:
+            state.interval_days = 6
+        else:
+            state.interval_days = round(state.interval_days * state.ease, 2)
+        state.repetitions += 1
+
+    state.ease = max(MIN_EASE, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    state.due_at = now + timedelta(days=state.interval_days)
+    state.last_reviewed_at = now
+    return state
+
+
+def start_deck(db: Session, user_id: int, deck_id: int) -> int:
+    """
+    Bắt đầu học deck: tạo review state cho mọi flashcard user chưa có (1 lần, ghi vào deck_learners).
+    Chủ deck không cần gọi - state được tạo lúc thêm flashcard, dữ liệu cũ được backfill trong migrate()
+    """
+    return crud.start_deck(db, user_id, deck_id)
+
+
+def record_review(db: Session, user_id: int, flashcard: models.Flashcard, quality: int) -> models.ReviewState:
+    """
+    Ghi nhận 1 lần ôn tập và tính lịch ôn tiếp theo; ghi kèm review_events (event_id do server
+    sinh) trong cùng commit → được tính vào thống kê reviews như review gửi theo batch
+    """
+    now = datetime.now(timezone.utc)
+    state = crud.get_review_state(db, user_id, flashcard.id)
+    if state is None:
+        state = models.ReviewState(
+            user_id=user_id,
+            flashcard_id=flashcard.id,
+            deck_id=flashcard.deck_id,
+            ease=2.5,
+            interval_days=0,
+            repetitions=0,
+            lapses=0,
+        )
+        db.add(state)
+
+    apply_sm2(state, quality, now=now)
+    db.add(models.ReviewEvent(
+        event_id=uuid.uuid4().hex,
+        user_id=user_id,
+        flashcard_id=flashcard.id,
+        deck_id=flashcard.deck_id,
+        quality=quality,
+        reviewed_at=now,
+    ))
+    db.commit()
+    db.refresh(state)
+    return state
+
+
+STATE_FIELDS = ("ease", "interval_days", "repetitions", "lapses", "due_at", "last_reviewed_at")
+
+
+def _as_utc(dt: Optional[datetime], default: datetime) -> datetime:
+    if dt is None:
+        return default
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def ingest_review_batch(
+    db: Session,
+    user_id: int,
+    session_id: Optional[str],
+    events: List[schemas.ReviewEventIn]
+) -> dict:
+    """
+    Ghi 1 batch review event trong 1 transaction:
+    1. Bỏ flashcard không tồn tại; trùng event_id trong batch → giữ lần đầu
+    2. INSERT review_events ... ON CONFLICT (user_id, event_id) DO NOTHING RETURNING event_id
+       → chỉ event thực sự được ghi mới được tính (replay batch / request song song → idempotent,
+       event mới trong batch vẫn được ghi dù có event trùng)
+    3. Khóa state hiện tại, tính SM-2 trong bộ nhớ theo thứ tự reviewed_at, rồi upsert
+       review_states (ON CONFLICT (user_id, flashcard_id) DO UPDATE) bằng 1 executemany
+    """
+    now = datetime.now(timezone.utc)
+
+    # Trùng event_id ngay trong batch → chỉ giữ lần đầu
+    unique_events = list({event.event_id: event for event in reversed(events)}.values())[::-1]
+
+    deck_of = crud.get_flashcard_decks(db, list({e.flashcard_id for e in unique_events}))
+    invalid = sorted({e.flashcard_id for e in unique_events if e.flashcard_id not in deck_of})
+    candidates = [e for e in unique_events if e.flashcard_id in deck_of]
+
+    inserted_ids = set()
+    if candidates:
+        stmt = crud.dialect_insert(db)(models.ReviewEvent).on_conflict_do_nothing(
+            index_elements=["user_id", "event_id"]
+        ).returning(models.ReviewEvent.event_id)
+        inserted_ids = set(db.execute(stmt, [
+            {
+                "event_id": e.event_id,
+                "user_id": user_id,
+                "flashcard_id": e.flashcard_id,
+                "deck_id": deck_of[e.flashcard_id],
+                "session_id": session_id,
+                "quality": e.quality,
+                "reviewed_at": _as_utc(e.reviewed_at, now),
+            }
+            for e in candidates
+        ]).scalars())
+
+    new_events = [e for e in candidates if e.event_id in inserted_ids]
+    new_events.sort(key=lambda e: _as_utc(e.reviewed_at, now))
+
+    result = {
+        "received": len(events),
+        "applied": len(new_events),
+        "duplicates": len(events) - len(new_events) - sum(1 for e in events if e.flashcard_id in invalid),
+        "invalid_flashcard_ids": invalid,
+    }
+    if not new_events:
+        db.rollback()
+        return result
+
+    # Trạng thái hiện tại của các flashcard liên quan (1 query, khóa tới commit
+    # → batch song song cho cùng flashcard không ghi đè kết quả của nhau)
+    states = {}
+    rows = crud.get_review_states_for_flashcards(
+        db, user_id, list({e.flashcard_id for e in new_events}), for_update=True
+    )
+    for row in rows:
+        states[row.flashcard_id] = SimpleNamespace(**{field: getattr(row, field) for field in STATE_FIELDS})
+    db.expunge_all()  # ghi bằng bulk upsert bên dưới, không cần identity map
+
+    for event in new_events:
+        state = states.get(event.flashcard_id)
+        if state is None:
+            state = states[event.flashcard_id] = SimpleNamespace(
+                ease=2.5, interval_days=0, repetitions=0, lapses=0,
+                due_at=now, last_reviewed_at=None
+            )
+        apply_sm2(state, event.quality, now=_as_utc(event.reviewed_at, now))
+
+    # Upsert: state do backfill / request khác tạo sau lúc đọc vẫn được cập nhật, không IntegrityError
+    stmt = crud.dialect_insert(db)(models.ReviewState)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "flashcard_id"],
+            set_={field: getattr(stmt.excluded, field) for field in STATE_FIELDS},
+        ),
+        [
+            {"user_id": user_id, "flashcard_id": fc_id, "deck_id": deck_of[fc_id],
+             **{field: getattr(state, field) for field in STATE_FIELDS}}
+            for fc_id, state in states.items()
+        ],
+    )
+    db.commit()
+    return result
@@ -0,0 +1,164 @@
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, literal, or_, select, true, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..crud import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# Scheduler refresh rollup mỗi N phút, chỉ tính lại các ngày gần đây; full refresh mỗi đêm
+STATS_REFRESH_MINUTES = int(os.getenv("STATS_REFRESH_MINUTES", "5"))
+STATS_REFRESH_WINDOW_DAYS = int(os.getenv("STATS_REFRESH_WINDOW_DAYS", "2"))
+
+
+def record_points_earned(db: Session, user_id: int, amount: int):
+    """Cộng điểm vào rollup ngày hôm nay (không commit - đi chung transaction cộng điểm)"""
+    if not user_id or amount <= 0:
+        return
+    stmt = dialect_insert(db)(models.UserDailyStats).values(
+        user_id=user_id,
+        day=datetime.now(timezone.utc).date(),
+        cards_added=0,
+        reviews=0,
+        points_earned=amount,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "day"],
+        set_={"points_earned": models.UserDailyStats.points_earned + amount},
+    ))
+
+
+def _refresh_deck_stats(db: Session, now: datetime, full: bool = False):
+    """
+    Đếm lại flashcard cho deck mới / deck có version đổi từ lần đếm trước (mọi đường tạo / xóa
+    flashcard đều bump Deck.version), upsert vào deck_stats; xóa stats của deck đã bị xóa.
+    full=True: đếm lại mọi deck (refresh hằng đêm, bắt cả thay đổi không qua crud)
+    """
+    counts = select(
+        models.Deck.id,
+        models.Deck.user_id,
+        func.count(models.Flashcard.id),
+        models.Deck.version,
+        literal(now, models.DeckStats.refreshed_at.type),
+    ).select_from(models.Deck).outerjoin(
+        models.Flashcard, models.Flashcard.deck_id == models.Deck.id
+    ).group_by(models.Deck.id, models.Deck.user_id, models.Deck.version)
+
+    if full:
+        counts = counts.where(true())  # SQLite: INSERT ... SELECT ... ON CONFLICT cần có WHERE
+    else:
+        changed = select(models.Deck.id).outerjoin(
+            models.DeckStats, models.DeckStats.deck_id == models.Deck.id
+        ).where(or_(
+            models.DeckStats.deck_version.is_(None),
+            models.DeckStats.deck_version != models.Deck.version,
+        ))
+        counts = counts.where(models.Deck.id.in_(changed))
+
+    stmt = dialect_insert(db)(models.DeckStats).from_select(
+        ["deck_id", "user_id", "flashcard_count", "deck_version", "refreshed_at"], counts
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["deck_id"],
+        set_={
+            "user_id": stmt.excluded.user_id,
+            "flashcard_count": stmt.excluded.flashcard_count,
+            "deck_version": stmt.excluded.deck_version,
+            "refreshed_at": stmt.excluded.refreshed_at,
+        },
+    ))
+    db.execute(delete(models.DeckStats).where(
+        ~select(models.Deck.id).where(models.Deck.id == models.DeckStats.deck_id).exists()
+    ))
+
+
+def _refresh_daily_stats(db: Session, since: Optional[date]):
+    """Tính lại cards_added / reviews theo ngày (từ `since`, None = toàn bộ)"""
+    added_day = func.date(models.Flashcard.created_at)
+    added = select(models.Deck.user_id, added_day, func.count(models.Flashcard.id)).join(
+        models.Flashcard, models.Flashcard.deck_id == models.Deck.id
+    ).group_by(models.Deck.user_id, added_day)
+
+    reviewed_day = func.date(models.ReviewEvent.reviewed_at)
+    reviewed = select(models.ReviewEvent.user_id, reviewed_day, func.count(models.ReviewEvent.id)).group_by(
+        models.ReviewEvent.user_id, reviewed_day
+    )
+
+    if since is not None:
+        added = added.where(models.Flashcard.created_at >= since)
+        reviewed = reviewed.where(models.ReviewEvent.reviewed_at >= since)
+
+    rows = {}
+    for user_id, day, count in db.execute(added):
+        rows.setdefault((user_id, day), {"cards_added": 0, "reviews": 0})["cards_added"] = count
+    for user_id, day, count in db.execute(reviewed):
+        rows.setdefault((user_id, day), {"cards_added": 0, "reviews": 0})["reviews"] = count
+
+    # Reset các ngày trong khoảng refresh (card bị xóa → về 0), giữ nguyên points_earned
+    reset = update(models.UserDailyStats).values(cards_added=0, reviews=0)
+    if since is not None:
+        reset = reset.where(models.UserDailyStats.day >= since)
+    db.execute(reset)
+
+    if rows:
+        stmt = dialect_insert(db)(models.UserDailyStats)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "day"],
+                set_={"cards_added": stmt.excluded.cards_added, "reviews": stmt.excluded.reviews},
+            ),
+            [
+                {
+                    "user_id": user_id,
+                    # SQLite date() trả về string 'YYYY-MM-DD'
+                    "day": date.fromisoformat(day) if isinstance(day, str) else day,
+                    "cards_added": values["cards_added"],
+                    "reviews": values["reviews"],
+                    "points_earned": 0,
+                }
+                for (user_id, day), values in rows.items()
+            ],
+        )
+
+
+def refresh_stats_rollups(db: Session, full: bool = False):
+    """Refresh toàn bộ rollup (gọi từ scheduler)"""
+    now = datetime.now(timezone.utc)
+    since = None if full else (now - timedelta(days=STATS_REFRESH_WINDOW_DAYS)).date()
+    try:
+        _refresh_deck_stats(db, now, full=full)
+        _refresh_daily_stats(db, since)
+        db.commit()
+        logger.info(f"Stats rollups refreshed ({'full' if full else f'since {since}'})")
+    except Exception as e:
+        logger.error(f"Error refreshing stats rollups: {e}")
+        db.rollback()
+        raise
+
+
+def get_user_stats(db: Session, user_id: int, days: int = 30) -> dict:
+    """Đọc thống kê user CHỈ từ bảng rollup (không đụng flashcards / decks)"""
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).date()
+
+    deck_rows = db.query(models.DeckStats).filter(models.DeckStats.user_id == user_id).all()
+    daily_rows = db.query(models.UserDailyStats).filter(
+        models.UserDailyStats.user_id == user_id,
+        models.UserDailyStats.day >= since
+    ).order_by(models.UserDailyStats.day).all()
+
+    return {
+        "user_id": user_id,
+        "deck_count": len(deck_rows),
+        "flashcard_count": sum(row.flashcard_count for row in deck_rows),
+        "cards_added": sum(row.cards_added for row in daily_rows),
+        "reviews": sum(row.reviews for row in daily_rows),
+        "points_earned": sum(row.points_earned for row in daily_rows),
+        "decks": deck_rows,
+        "daily": daily_rows,
+        "refreshed_at": max((row.refreshed_at for row in deck_rows), default=None),
+    }
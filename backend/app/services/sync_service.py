@@ -0,0 +1,68 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from .. import crud
+
+# Tombstone giữ N ngày; client có cursor cũ hơn phải tải lại snapshot đầy đủ
+SYNC_TOMBSTONE_TTL_DAYS = int(os.getenv("SYNC_TOMBSTONE_TTL_DAYS", "90"))
+# Cursor không vượt quá now - N giây: dòng có updated_at sớm nhưng commit muộn (transaction dài,
+# lệch giờ giữa các worker) vẫn nằm sau cursor ở lần sync tới
+SYNC_CURSOR_LAG_SECONDS = int(os.getenv("SYNC_CURSOR_LAG_SECONDS", "60"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite trả về naive datetime → coi là UTC
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[datetime]:
+    if not cursor:
+        return None
+    try:
+        return _as_utc(datetime.fromisoformat(cursor))
+    except ValueError:
+        raise InvalidCursor(f"Invalid sync cursor: {cursor}")
+
+
+def get_changes(db: Session, user_id: int, cursor: Optional[str]) -> dict:
+    """
+    Trả về deck / flashcard đã tạo, sửa, xóa sau cursor.
+    - Không có cursor, hoặc cursor cũ hơn thời hạn giữ tombstone → snapshot đầy đủ (full=True)
+    - Cursor mới = timestamp lớn nhất đã trả về, nhưng không quá now - SYNC_CURSOR_LAG_SECONDS
+      → thay đổi gần đây có thể được trả lại ở lần sync sau: client áp dụng idempotent
+      (upsert / xóa theo id). Khi không còn thay đổi mới, client đã cập nhật nhận response rỗng
+    """
+    now = datetime.now(timezone.utc)
+    since = parse_cursor(cursor)
+    horizon = now - timedelta(days=SYNC_TOMBSTONE_TTL_DAYS)
+    full = since is None or since < horizon
+    if full:
+        since = None
+
+    decks = crud.get_decks_changed_since(db, user_id, since)
+    flashcards = crud.get_flashcards_changed_since(db, user_id, since)
+    tombstones = [] if full else crud.get_tombstones_since(db, user_id, since)
+
+    timestamps = [_as_utc(d["updated_at"]) for d in decks if d["updated_at"]]
+    timestamps += [_as_utc(fc.updated_at) for fc in flashcards if fc.updated_at]
+    timestamps += [_as_utc(t.deleted_at) for t in tombstones]
+    next_cursor = max(timestamps) if timestamps else datetime(1970, 1, 1, tzinfo=timezone.utc)
+    next_cursor = min(next_cursor, now - timedelta(seconds=SYNC_CURSOR_LAG_SECONDS))
+    if since is not None:
+        next_cursor = max(next_cursor, since)
+
+    return {
+        "cursor": next_cursor.isoformat(),
+        "full": full,
+        "decks": decks,
+        "flashcards": flashcards,
+        "deleted_deck_ids": [t.entity_id for t in tombstones if t.entity == "deck"],
+        "deleted_flashcard_ids": [t.entity_id for t in tombstones if t.entity == "flashcard"],
+    }
@@ -1,7 +1,10 @@
-from gtts import gTTS
 import os
 from pathlib import Path
 import hashlib
+import uuid
+from . import google_clients
+from ..utils.circuit_breaker import tts_breaker
+from ..utils.metrics import track_external
 
 class TTSService:
     def __init__(self):
@@ -28,9 +31,21 @@ class TTSService:
         
         # Check if file already exists
         if not filepath.exists():
+            # Ghi ra file tạm rồi rename: lời gọi quá timeout budget vẫn chạy nốt ở nền,
+            # không để lại file mp3 dở dang bị coi là cache
+            tmp_path = filepath.with_suffix(f".{uuid.uuid4().hex}.tmp")
+
+            def save():
+                try:
+                    with track_external("gtts"):
+                        google_clients.tts_client.synthesize(text, lang_code, str(tmp_path))
+                    os.replace(tmp_path, filepath)
+                finally:
+                    if tmp_path.exists():
+                        tmp_path.unlink()
+
             try:
-                tts = gTTS(text=text, lang=lang_code, slow=False)
-                tts.save(str(filepath))
+                tts_breaker.call(save)
                 print(f"✅ Created audio file: {filepath}")
             except Exception as e:
                 print(f"❌ TTS Error: {e}")
@@ -0,0 +1,154 @@
+"""
+Circuit breaker cho lời gọi dịch vụ ngoài (Google Translate, gTTS, Tatoeba).
+
+- Mỗi lời gọi có timeout budget riêng (call_timeout): chạy trong thread pool nhỏ của breaker
+  và chỉ chờ tối đa call_timeout giây. Hàm được gọi vẫn phải có socket timeout của riêng nó
+  (requests timeout=..., utils.http_timeout cho gTTS / deep_translator) thì thread mới được trả lại
+- Lỗi / timeout liên tiếp >= failure_threshold → OPEN: gọi là raise CircuitOpenError ngay,
+  không đụng mạng, trong reset_timeout giây
+- Hết reset_timeout → HALF_OPEN: cho 1 lời gọi thử; thành công → CLOSED, lỗi → OPEN lại
+
+Chỗ gọi bắt CircuitBreakerError để trả giá trị cache cũ / kết quả local thay vì lỗi.
+Cấu hình qua env, vd. với tatoeba: BREAKER_TATOEBA_FAILURES, BREAKER_TATOEBA_RESET_SECONDS,
+BREAKER_TATOEBA_TIMEOUT_SECONDS. Trạng thái xuất ở GET /metrics.
+"""
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from .metrics import Counter, Gauge, registry
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = registry.register(Gauge(
+    "external_circuit_state", "Circuit breaker state per external service (0 closed, 1 half-open, 2 open)",
+    ("service",)
+))
+CIRCUIT_SHORT_CIRCUITED = registry.register(Counter(
+    "external_circuit_short_circuited_total", "Calls rejected without a network call because the circuit was open",
+    ("service",)
+))
+CIRCUIT_TIMEOUTS = registry.register(Counter(
+    "external_circuit_timeouts_total", "Calls that exceeded the breaker timeout budget", ("service",)
+))
+
+
+class CircuitBreakerError(Exception):
+    """Không gọi được dịch vụ (circuit mở / quá timeout); retry_after = số giây nên chờ"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(CircuitBreakerError):
+    pass
+
+
+class CallTimeoutError(CircuitBreakerError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, call_timeout: float,
+                 max_workers: int = 8):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        # Lời gọi quá hạn vẫn chạy nốt trong pool này tới socket timeout (không giết được thread) → pool nhỏ, riêng
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"breaker-{name}")
+
+        CIRCUIT_STATE.set(0, name)
+
+    @classmethod
+    def from_env(cls, name: str, failure_threshold: int, reset_timeout: float, call_timeout: float):
+        prefix = f"BREAKER_{name.upper()}"
+        return cls(
+            name,
+            int(os.getenv(f"{prefix}_FAILURES", str(failure_threshold))),
+            float(os.getenv(f"{prefix}_RESET_SECONDS", str(reset_timeout))),
+            float(os.getenv(f"{prefix}_TIMEOUT_SECONDS", str(call_timeout))),
+        )
+
+    def _set_state(self, state: str):
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], self.name)
+
+    def retry_after(self) -> int:
+        """Số giây tới lúc breaker cho gọi thử lại (>= 1)"""
+        if self.state != OPEN:
+            return 1
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        return max(1, math.ceil(remaining))
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    CIRCUIT_SHORT_CIRCUITED.inc(self.name)
+                    raise CircuitOpenError(f"{self.name} circuit is open", self.retry_after())
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._trial_running:
+                    # Chỉ 1 lời gọi thử; các lời gọi khác coi như còn mở
+                    CIRCUIT_SHORT_CIRCUITED.inc(self.name)
+                    raise CircuitOpenError(f"{self.name} circuit is half-open", 1)
+                self._trial_running = True
+
+    def _on_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def _on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def call(self, func, *args, **kwargs):
+        """Gọi func(*args, **kwargs) qua breaker; raise CircuitBreakerError hoặc lỗi gốc của func"""
+        self._before_call()
+        future = self._executor.submit(func, *args, **kwargs)
+        try:
+            result = future.result(timeout=self.call_timeout)
+        except FutureTimeoutError:
+            # Còn xếp hàng trong pool (chưa chạy) → bỏ luôn; đang chạy thì chờ socket timeout
+            future.cancel()
+            CIRCUIT_TIMEOUTS.inc(self.name)
+            self._on_failure()
+            raise CallTimeoutError(
+                f"{self.name} did not respond within {self.call_timeout:g}s", self.retry_after()
+            ) from None
+        except Exception:
+            self._on_failure()
+            raise
+        self._on_success()
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": self.retry_after() if self.state == OPEN else 0,
+        }
+
+
+# Mặc định: (số lỗi liên tiếp để mở, giây mở trước khi thử lại, timeout budget mỗi lời gọi)
+translate_breaker = CircuitBreaker.from_env("translate", 5, 30, 4)
+tts_breaker = CircuitBreaker.from_env("tts", 5, 30, 8)
+tatoeba_breaker = CircuitBreaker.from_env("tatoeba", 5, 60, 5)
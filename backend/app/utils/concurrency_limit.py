@@ -0,0 +1,140 @@
+"""
+Giới hạn số request đồng thời gọi từng dịch vụ ngoài (gTTS, Google Translate, Tatoeba, OpenAI).
+
+Dùng làm dependency của route: chờ slot trên event loop, TRƯỚC khi route sync chiếm 1 thread
+của threadpool → burst vào /api/tts/speak không làm nghẽn các route DB khác.
+- Hết slot → vào hàng đợi giới hạn (max_queue); hàng đợi đầy → 429 ngay
+- Chờ quá queue_timeout giây → 503
+- Cả 2 trường hợp có header Retry-After (ước lượng từ thời gian giữ slot trung bình)
+- Slot được trả sau khi response gửi xong (kể cả StreamingResponse / FileResponse)
+
+Cấu hình mỗi dịch vụ qua env, vd. với tts: LIMIT_TTS_CONCURRENCY, LIMIT_TTS_QUEUE,
+LIMIT_TTS_QUEUE_TIMEOUT. Số đang chạy / đang chờ / bị từ chối xuất ở GET /metrics.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+from fastapi import HTTPException
+
+from .metrics import Counter, Gauge, registry
+
+LIMITER_IN_FLIGHT = registry.register(Gauge(
+    "external_limiter_in_flight", "Requests holding a concurrency slot per external service", ("service",)
+))
+LIMITER_QUEUE_DEPTH = registry.register(Gauge(
+    "external_limiter_queue_depth", "Requests waiting for a concurrency slot per external service", ("service",)
+))
+LIMITER_REJECTED = registry.register(Counter(
+    "external_limiter_rejected_total", "Requests rejected by the concurrency limiter", ("service", "reason")
+))
+
+# Hệ số làm mượt trung bình thời gian giữ slot (EWMA) cho Retry-After
+_HOLD_EWMA_ALPHA = 0.2
+
+
+class ConcurrencyLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+        self._avg_hold = 1.0  # giây
+
+        LIMITER_IN_FLIGHT.set(0, name)
+        LIMITER_QUEUE_DEPTH.set(0, name)
+
+    @classmethod
+    def from_env(cls, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        prefix = f"LIMIT_{name.upper()}"
+        return cls(
+            name,
+            int(os.getenv(f"{prefix}_CONCURRENCY", str(max_concurrent))),
+            int(os.getenv(f"{prefix}_QUEUE", str(max_queue))),
+            float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", str(queue_timeout))),
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Ước lượng số giây tới khi có slot: (số đang chờ + 1) lượt, mỗi lượt max_concurrent slot"""
+        rounds = (self.queue_depth + 1) / self.max_concurrent
+        return max(1, math.ceil(self._avg_hold * rounds))
+
+    def _reject(self, status_code: int, reason: str, detail: str):
+        LIMITER_REJECTED.inc(self.name, reason)
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    def _update_gauges(self):
+        LIMITER_IN_FLIGHT.set(self.active, self.name)
+        LIMITER_QUEUE_DEPTH.set(self.queue_depth, self.name)
+
+    async def acquire(self):
+        # Chỉ chạy trên event loop (1 thread) → không cần lock
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self._update_gauges()
+            return
+        if self.queue_depth >= self.max_queue:
+            self._reject(429, "queue_full", f"Too many concurrent {self.name} requests, retry later")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            # Slot được chuyển thẳng cho waiter trong release() (active không giảm)
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # vừa được cấp slot đúng lúc hết giờ → dùng luôn
+            waiter.cancel()
+            self._reject(503, "queue_timeout", f"{self.name} is busy, retry later")
+        except asyncio.CancelledError:
+            # Client ngắt kết nối khi đang chờ: đã được cấp slot thì trả lại
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._update_gauges()
+
+    def release(self, held_seconds: float = None):
+        if held_seconds is not None:
+            self._avg_hold += _HOLD_EWMA_ALPHA * (held_seconds - self._avg_hold)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+    async def __call__(self):
+        """Dependency FastAPI: giữ slot suốt request"""
+        await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+
+# Mặc định: (số đồng thời, độ dài hàng đợi, giây chờ tối đa)
+tts_limiter = ConcurrencyLimiter.from_env("tts", 4, 16, 5)
+dictionary_limiter = ConcurrencyLimiter.from_env("dictionary", 8, 32, 5)
+example_limiter = ConcurrencyLimiter.from_env("examples", 4, 16, 5)
+chatgpt_limiter = ConcurrencyLimiter.from_env("chatgpt", 8, 32, 10)
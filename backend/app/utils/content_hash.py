@@ -0,0 +1,13 @@
+import hashlib
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """Chuẩn hoá để so trùng: Unicode NFC, bỏ khoảng trắng thừa, không phân biệt hoa thường"""
+    return " ".join(unicodedata.normalize("NFC", text or "").split()).casefold()
+
+
+def flashcard_content_hash(vietnamese: str, target_language: str) -> str:
+    """Hash nội dung flashcard (tiếng Việt + từ vựng) dùng để phát hiện thẻ trùng trong deck"""
+    raw = normalize_text(vietnamese) + "\x1f" + normalize_text(target_language)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """ETag yếu từ version counter, vd. W/"deck-3-v12" """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def _normalize(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    Trả về response 304 nếu If-None-Match của client khớp etag, ngược lại None.
+    So sánh kiểu weak (bỏ tiền tố W/) theo RFC 9110.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    candidates = [_normalize(tag) for tag in header.split(",")]
+    if "*" in candidates or _normalize(etag) in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
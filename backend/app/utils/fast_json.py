@@ -0,0 +1,39 @@
+"""
+Response JSON nhanh cho endpoint trả về list lớn.
+
+Route chọn dùng bằng cách trả về FastJSONResponse(rows) với rows là dict thuần
+(từ query cột, không qua ORM) → FastAPI bỏ qua bước validate response_model,
+response_model vẫn giữ để sinh tài liệu OpenAPI.
+Dùng orjson nếu có, fallback json chuẩn.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson là tùy chọn
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # OPT_UTC_Z: datetime UTC ra "...Z" giống Pydantic
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
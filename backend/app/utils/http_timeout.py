@@ -0,0 +1,63 @@
+"""
+Timeout mặc định cho thư viện gọi HTTP bằng `requests` mà không cho truyền timeout
+(gTTS, deep_translator): không có timeout thì lời gọi treo giữ mãi 1 thread trong pool
+của circuit breaker, kể cả sau khi breaker đã trả CallTimeoutError.
+
+    import gtts.tts
+    inject_default_timeout(gtts.tts, 8)
+
+Chỉ thay biến `requests` trong module của thư viện đó; module `requests` thật không đổi.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter dùng timeout mặc định khi caller không truyền timeout"""
+
+    def __init__(self, timeout: float, *args, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+
+def session_with_timeout(timeout: float) -> requests.Session:
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(timeout)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class _RequestsWithTimeout:
+    """Thay thế module `requests` bên trong 1 thư viện: Session() / get() có timeout mặc định"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    def Session(self) -> requests.Session:
+        return session_with_timeout(self.timeout)
+
+    def request(self, method: str, url: str, **kwargs):
+        with self.Session() as session:
+            return session.request(method, url, **kwargs)
+
+    def get(self, url: str, params=None, **kwargs):
+        return self.request("get", url, params=params, **kwargs)
+
+    def post(self, url: str, data=None, json=None, **kwargs):
+        return self.request("post", url, data=data, json=json, **kwargs)
+
+
+def inject_default_timeout(module, timeout: float):
+    """Mọi lời gọi `requests.Session()` / `requests.get()` / ... trong `module` có timeout mặc định (giây)"""
+    current = getattr(module, "requests", None)
+    if isinstance(current, _RequestsWithTimeout):
+        current.timeout = timeout
+    else:
+        module.requests = _RequestsWithTimeout(timeout)
@@ -0,0 +1,20 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+# Token cho endpoint nội bộ (/api/internal/*, /metrics).
+# Không set: dev → không kiểm tra; môi trường khác → chặn hết (fail closed, 403)
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+APP_ENV = os.getenv("APP_ENV", "dev").lower()
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Dependency: chặn endpoint nội bộ nếu thiếu / sai header X-Internal-Token"""
+    if not INTERNAL_API_TOKEN:
+        if APP_ENV == "dev":
+            return
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
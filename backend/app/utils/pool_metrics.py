@@ -0,0 +1,186 @@
+"""
+Đo connection pool của SQLAlchemy: thời gian chờ checkout, mức bão hòa, overflow.
+
+InstrumentedQueuePool đo thời gian chờ lấy connection (kể cả khi phải đợi
+connection trả về pool / mở connection mới), event listener đếm connect /
+checkout / checkin / invalidate. Số liệu xem ở GET /api/internal/db-pool và GET /metrics.
+"""
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from .metrics import render_family
+
+# Số mẫu checkout gần nhất giữ lại để tính percentile
+RECENT_SAMPLES = 1000
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self._recent_waits = deque(maxlen=RECENT_SAMPLES)
+
+    def record_wait(self, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.wait_count += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self._recent_waits.append(wait_ms)
+
+    def _incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def attach(self, engine):
+        """Gắn listener vào engine (listener đi theo pool mới khi engine.dispose())"""
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.metrics = self
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self._incr("connects")
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+                checked_out = _checked_out(engine.pool)
+                if checked_out is not None:
+                    self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            self._incr("checkins")
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self._incr("invalidations")
+
+    def snapshot(self, engine) -> dict:
+        pool = engine.pool
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            data = {
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "checkout_timeouts": self.timeouts,
+                "peak_checked_out": self.peak_checked_out,
+                "checkout_wait_ms": {
+                    "avg": round(self.wait_total_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                    "p50": _percentile(waits, 0.50),
+                    "p95": _percentile(waits, 0.95),
+                    "p99": _percentile(waits, 0.99),
+                    "max": round(self.wait_max_ms, 3),
+                    "recent_samples": len(waits),
+                },
+            }
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            checked_out = pool.checkedout()
+            data.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_out": checked_out,
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                # 1.0 = mọi connection (kể cả overflow) đang bận → request sau phải chờ
+                "saturation": round(checked_out / capacity, 3) if capacity > 0 else None,
+            })
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool đo thời gian chờ checkout (dùng qua create_engine(poolclass=...))"""
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_wait(0.0, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        # dispose() / fork tạo pool mới → giữ lại metrics
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+def _checked_out(pool):
+    return pool.checkedout() if isinstance(pool, QueuePool) else None
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return round(values[index], 3)
+
+
+# (tên metric, kiểu, mô tả, key trong snapshot)
+PROMETHEUS_POOL_FIELDS = (
+    ("db_pool_checked_out", "gauge", "Connections currently checked out", "checked_out"),
+    ("db_pool_overflow", "gauge", "Overflow connections currently open", "overflow"),
+    ("db_pool_saturation", "gauge", "Checked out / (pool size + max overflow)", "saturation"),
+    ("db_pool_checkouts_total", "counter", "Connection checkouts", "checkouts"),
+    ("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting for a connection", "checkout_timeouts"),
+    ("db_pool_connects_total", "counter", "New DBAPI connections opened", "connects"),
+)
+
+
+def pool_collector(pools):
+    """
+    Collector cho /metrics. `pools` là hàm trả về {tên pool: (PoolMetrics, engine)}
+    (gọi lúc scrape vì read / async engine có thể không bật)
+    """
+    def collect():
+        snapshots = {name: metrics.snapshot(engine) for name, (metrics, engine) in pools().items()}
+        lines = []
+        for metric_name, kind, documentation, key in PROMETHEUS_POOL_FIELDS:
+            samples = [
+                ({"pool": name}, snapshot[key])
+                for name, snapshot in snapshots.items()
+                if snapshot.get(key) is not None
+            ]
+            if samples:
+                lines.extend(render_family(metric_name, kind, documentation, samples))
+        wait_samples = [
+            ({"pool": name, "quantile": quantile}, snapshot["checkout_wait_ms"][field] / 1000)
+            for name, snapshot in snapshots.items()
+            for quantile, field in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))
+        ]
+        if wait_samples:
+            lines.extend(render_family(
+                "db_pool_checkout_wait_seconds", "gauge",
+                "Checkout wait over recent checkouts (quantiles)", wait_samples
+            ))
+        return lines
+
+    return collect
@@ -0,0 +1,159 @@
+"""
+Đếm / đo thời gian câu SQL trong 1 phạm vi (1 request, 1 đoạn code) qua event của engine.
+
+- attach(engine): gắn listener 1 lần lúc khởi tạo; khi không có profile đang chạy
+  listener chỉ đọc 1 ContextVar rồi return nên gần như không tốn gì
+- profile_queries(): context manager thu thập câu SQL chạy bên trong (kể cả trong
+  threadpool của route sync vì run_in_threadpool copy context)
+- Câu SQL được chuẩn hóa thành "shape" (bỏ literal / tham số, gộp IN (...)): cùng 1 shape
+  lặp >= SQL_PROFILE_N_PLUS_ONE_THRESHOLD lần → nghi N+1 (vd. len(user.decks) trong vòng lặp)
+- assert_max_queries(n): helper cho test / script kiểm tra số query tối đa của 1 endpoint;
+  thu thập ở mức process (TestClient chạy app ở thread khác, không thấy ContextVar của test)
+"""
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+
+SQL_PROFILE_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_PROFILE_N_PLUS_ONE_THRESHOLD", "5"))
+
+_current_profile: ContextVar[Optional["QueryProfile"]] = ContextVar("query_profile", default=None)
+# Profile nhận MỌI câu SQL của process (chỉ dùng trong test / script, không dùng khi chạy thật)
+_global_profiles: List["QueryProfile"] = []
+_global_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"(%\(\w+\)s|%s|\$\d+|:\w+|\?)")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_POSTCOMPILE = re.compile(r"\(__\[POSTCOMPILE_\w+\]\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Chuẩn hóa SQL: literal / tham số → ?, IN (?, ?, ...) → IN (...), gộp khoảng trắng"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _POSTCOMPILE.sub("(...)", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryProfile:
+    def __init__(self, n_plus_one_threshold: int = SQL_PROFILE_N_PLUS_ONE_THRESHOLD):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.statements: List[tuple] = []  # (sql, thời gian ms)
+
+    def record(self, statement: str, duration_ms: float):
+        self.statements.append((statement, round(duration_ms, 3)))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(duration for _, duration in self.statements), 3)
+
+    def repeated_shapes(self) -> List[tuple]:
+        """[(shape, số lần)] cho các shape lặp từ ngưỡng N+1 trở lên, nhiều nhất trước"""
+        shapes = Counter(statement_shape(sql) for sql, _ in self.statements)
+        return [
+            (shape, count) for shape, count in shapes.most_common()
+            if count >= self.n_plus_one_threshold
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "n_plus_one": [{"shape": shape, "count": count} for shape, count in self.repeated_shapes()],
+        }
+
+    def header_value(self) -> str:
+        """Dạng gọn cho header X-Query-Profile"""
+        value = f"count={self.count}; time_ms={self.total_ms}"
+        repeated = self.repeated_shapes()
+        if repeated:
+            value += f"; n_plus_one={len(repeated)}; worst={repeated[0][1]}x"
+        return value
+
+    def describe(self) -> str:
+        lines = [f"{self.count} queries, {self.total_ms} ms"]
+        for shape, count in self.repeated_shapes():
+            lines.append(f"  N+1? {count}x {shape[:300]}")
+        for index, (sql, duration) in enumerate(self.statements, 1):
+            lines.append(f"  {index:>3}. {duration:8.3f} ms  {_WHITESPACE.sub(' ', sql)[:300]}")
+        return "\n".join(lines)
+
+
+def _is_profiling() -> bool:
+    return _current_profile.get() is not None or bool(_global_profiles)
+
+
+def attach(engine):
+    """Gắn listener đo câu SQL vào engine (sync engine; async → engine.sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _is_profiling():
+            conn.info.setdefault("query_profiler_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_profiler_start")
+        if not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(statement, duration_ms)
+        with _global_lock:
+            for global_profile in _global_profiles:
+                if global_profile is not profile:
+                    global_profile.record(statement, duration_ms)
+
+
+@contextmanager
+def profile_queries(n_plus_one_threshold: int = SQL_PROFILE_N_PLUS_ONE_THRESHOLD):
+    """Thu thập câu SQL chạy trong khối with (engine phải đã attach())"""
+    profile = QueryProfile(n_plus_one_threshold)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def profile_all_queries(n_plus_one_threshold: int = SQL_PROFILE_N_PLUS_ONE_THRESHOLD):
+    """Như profile_queries nhưng nhận câu SQL từ mọi thread / task của process"""
+    profile = QueryProfile(n_plus_one_threshold)
+    with _global_lock:
+        _global_profiles.append(profile)
+    try:
+        yield profile
+    finally:
+        with _global_lock:
+            _global_profiles.remove(profile)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """
+    Raise AssertionError (kèm danh sách câu SQL) nếu khối with chạy quá max_queries câu.
+
+        with assert_max_queries(3):
+            client.get("/api/users")
+    """
+    with profile_all_queries() as profile:
+        yield profile
+    if profile.count > max_queries:
+        raise AssertionError(f"Expected at most {max_queries} queries, got {profile.describe()}")
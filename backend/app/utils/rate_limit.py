@@ -0,0 +1,25 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Giới hạn tốc độ gọi (thread-safe): tối đa `rate` lần / giây.
+    Mỗi lần gọi wait() sẽ ngủ cho tới slot kế tiếp.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,51 @@
+"""
+PRAGMA cho SQLite khi chạy thật (self-host), set trên mỗi connection mới:
+
+- journal_mode=WAL   : đọc không chặn ghi, ghi không chặn đọc
+- synchronous=NORMAL : an toàn với WAL, nhanh hơn FULL nhiều
+- busy_timeout       : chờ lock thay vì lỗi "database is locked" ngay
+- cache_size / mmap_size
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def is_memory_url(url: str) -> bool:
+    return ":memory:" in url or url in ("sqlite://", "sqlite+aiosqlite://")
+
+
+def sqlite_pragmas(read_only: bool = False):
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}",  # số âm = KiB
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # journal_mode lưu trong file DB → chỉ connection ghi cần set
+        pragmas.insert(0, f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        pragmas.insert(1, f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, read_only: bool = False):
+    """Gắn listener set PRAGMA cho mỗi connection SQLite mới của engine"""
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
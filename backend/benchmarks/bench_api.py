@@ -0,0 +1,232 @@
+"""
+Benchmark API trong process: gọi thẳng ASGI app qua httpx.ASGITransport (không mạng,
+không uvicorn) trên DB đã seed bằng benchmarks.seed_data, báo p50 / p95 / p99 và req/s.
+
+Kịch bản: users listing, deck listing, flashcard listing, quiz options, CSV export, CSV upload.
+Dịch vụ ngoài (Google Translate, gTTS, Tatoeba, OpenAI) được stub bằng hàm trả kết quả cố định
+(thêm độ trễ giả lập bằng --external-latency-ms) → số đo chỉ phản ánh code của app.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_api --users 50 --decks 4 --cards 200 --requests 200 --concurrency 8
+    python -m benchmarks.bench_api --save baseline.json               # lưu kết quả
+    python -m benchmarks.bench_api --compare baseline.json --max-regression 1.25
+--compare: exit code 1 nếu p95 của kịch bản nào chậm hơn baseline quá --max-regression lần.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+
+def stub_external_services(latency_ms: float = 0.0):
+    """Thay các lời gọi mạng bằng stub tất định (gọi sau khi import app)"""
+    from app.services import ai_example_generator, google_clients
+    from app.services.chatgpt_service import chatgpt_service
+
+    delay = latency_ms / 1000
+
+    class FakeTranslateClient:
+        def translate(self, text: str, source: str, target: str) -> str:
+            time.sleep(delay)
+            return f"{text} [{target}]"
+
+    def fake_tatoeba(word: str, from_lang: str, to_lang: str = "vie", limit: int = 10):
+        time.sleep(delay)
+        return [{"target": f"{word} example {i}", "vietnamese": f"ví dụ {i}"} for i in range(min(limit, 3))]
+
+    class FakeTTSClient:
+        def synthesize(self, text: str, lang_code: str, path: str) -> None:
+            time.sleep(delay)
+            with open(path, "wb") as f:
+                f.write(b"\xff\xfb" + b"\x00" * 1024)
+
+    async def fake_complete(messages):
+        await asyncio.sleep(delay)
+        return "stubbed reply"
+
+    async def fake_stream(messages):
+        await asyncio.sleep(delay)
+        yield "stubbed reply"
+
+    google_clients.translate_client = FakeTranslateClient()
+    google_clients.tts_client = FakeTTSClient()
+    ai_example_generator.search_tatoeba = fake_tatoeba
+    chatgpt_service.complete = fake_complete
+    chatgpt_service.stream = fake_stream
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def build_scenarios(data: Dict[str, list], rng: random.Random) -> Dict[str, callable]:
+    """{tên: hàm(i) → (method, url, kwargs)}; chọn user / deck bằng rng cố định → tái lập được"""
+    from benchmarks.seed_data import make_flashcard_rows
+
+    user_ids, decks = data["user_ids"], data["decks"]
+    picks = [rng.randrange(len(decks)) for _ in range(4096)]
+    upload_deck_id, upload_language = decks[0]
+
+    def deck(i):
+        return decks[picks[i % len(picks)]]
+
+    def quiz(i):
+        deck_id, language = deck(i)
+        return "GET", f"/api/quiz/generate-options/{deck_id}", {
+            "params": {"word": "x", "word_vietnamese": "x", "language": language}
+        }
+
+    def upload(i):
+        # Mỗi request 1 lô thẻ mới (không trùng) → đo đúng đường tạo thẻ, không phải đường skip
+        rows = make_flashcard_rows(random.Random(i), upload_language, 50, start=100000 + i * 50)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=["vietnamese", "pronunciation", "target_language"])
+        writer.writeheader()
+        for row in rows:
+            # Nửa số dòng để trống pronunciation → app tự sinh (romanization local)
+            writer.writerow({**row, "pronunciation": row["pronunciation"] if len(row["vietnamese"]) % 2 else ""})
+        return "POST", f"/api/flashcards/upload-csv/{upload_deck_id}", {
+            "files": {"file": ("bench.csv", buffer.getvalue().encode("utf-8"), "text/csv")}
+        }
+
+    return {
+        "users_list": lambda i: ("GET", "/api/users", {}),
+        "deck_list": lambda i: ("GET", f"/api/decks/user/{user_ids[i % len(user_ids)]}", {}),
+        "flashcard_list": lambda i: ("GET", f"/api/flashcards/deck/{deck(i)[0]}", {}),
+        "quiz_options": quiz,
+        "csv_export": lambda i: ("GET", f"/api/decks/{deck(i)[0]}/export-csv", {}),
+        "csv_upload": upload,
+    }
+
+
+async def run_scenario(client, make_request, requests: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        method, url, kwargs = make_request(-1 - i)
+        await client.request(method, url, **kwargs)
+
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies), 3) if latencies else 0.0,
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+async def run_all(app, scenarios, args) -> Dict[str, dict]:
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, make_request in scenarios.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await run_scenario(client, make_request, args.requests, args.concurrency, args.warmup)
+            r = results[name]
+            print(
+                f"  {name:<16} {r['rps']:8.1f} req/s   p50 {r['p50_ms']:8.2f} ms   "
+                f"p95 {r['p95_ms']:8.2f} ms   p99 {r['p99_ms']:8.2f} ms   errors {r['errors']}"
+            )
+    return results
+
+
+def compare(results: Dict[str, dict], baseline_path: str, max_regression: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    print(f"\nSo với {baseline_path} (ngưỡng p95 x{max_regression:g}):")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous["p95_ms"]:
+            continue
+        ratio = current["p95_ms"] / previous["p95_ms"]
+        flag = "REGRESSION" if ratio > max_regression else "ok"
+        regressions += flag != "ok"
+        print(f"  {name:<16} p95 {previous['p95_ms']:8.2f} → {current['p95_ms']:8.2f} ms  x{ratio:.2f}  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--decks", type=int, default=4, help="deck mỗi user")
+    parser.add_argument("--cards", type=int, default=200, help="flashcard mỗi deck")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="request mỗi kịch bản")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--external-latency-ms", type=float, default=0.0)
+    parser.add_argument("--only", nargs="*", help="chỉ chạy các kịch bản này")
+    parser.add_argument("--save", help="ghi kết quả ra file JSON")
+    parser.add_argument("--compare", help="file JSON baseline từ --save")
+    parser.add_argument("--max-regression", type=float, default=1.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Phải set trước khi import app (engine tạo lúc import)
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("APP_ENV", "dev")
+
+        from app.database import SessionLocal, engine
+        from app.main import app
+        from app.migrations import migrate
+        from benchmarks.seed_data import generate
+
+        stub_external_services(args.external_latency_ms)
+        # Không chạy startup của app → scheduler không start, job nền không chen vào số đo
+        migrate(engine)
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            data = generate(db, args.users, args.decks, args.cards, args.seed)
+        print(
+            f"Seed: {args.users} users x {args.decks} decks x {args.cards} cards "
+            f"({time.perf_counter() - start:.1f}s); {args.requests} requests/kịch bản, "
+            f"concurrency {args.concurrency}"
+        )
+
+        random.seed(args.seed)  # quiz dùng random.sample
+        scenarios = build_scenarios(data, random.Random(args.seed))
+        results = asyncio.run(run_all(app, scenarios, args))
+        engine.dispose()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"Saved → {args.save}")
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.max_regression) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Số byte trên đường truyền khi nén response, với dữ liệu giống thật:
+JSON của GET /flashcards/deck/{deck_id} và CSV của GET /decks/{deck_id}/export-csv.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_compression --cards 2000
+"""
+import argparse
+import csv
+import gzip
+import io
+import time
+from datetime import datetime, timezone
+
+from app.middleware import compression
+from app.utils import fast_json
+
+SAMPLES = [
+    ("xin chào", "こんにちは", "konnichiwa"),
+    ("cảm ơn", "감사합니다", "gamsahamnida"),
+    ("học sinh", "学生", "xuéshēng"),
+    ("thư viện", "library", "/ˈlaɪbrəri/"),
+]
+
+
+def build_payloads(cards: int):
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(cards):
+        vietnamese, target, pronunciation = SAMPLES[i % len(SAMPLES)]
+        rows.append({
+            "id": i + 1,
+            "deck_id": 1,
+            "vietnamese": f"{vietnamese} {i}",
+            "pronunciation": pronunciation,
+            "target_language": f"{target} {i}",
+            "created_at": now,
+            "updated_at": now,
+        })
+    json_body = fast_json.dumps(rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["vietnamese", "pronunciation", "target_language"])
+    for row in rows:
+        writer.writerow([row["vietnamese"], row["pronunciation"], row["target_language"]])
+    csv_body = buffer.getvalue().encode("utf-8")
+    return {"deck JSON": json_body, "export CSV": csv_body}
+
+
+def variants():
+    for level in (1, 6, 9):
+        yield f"gzip-{level}", lambda data, level=level: gzip.compress(data, compresslevel=level)
+    if compression.brotli is not None:
+        for quality in (4, 6, 11):
+            yield f"br-{quality}", lambda data, quality=quality: compression.brotli.compress(data, quality=quality)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, body in build_payloads(args.cards).items():
+        print(f"{name}: {len(body):,} bytes ({args.cards} cards)")
+        for label, fn in variants():
+            start = time.perf_counter()
+            compressed = fn(body)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  {label:<8} {len(compressed):>10,} bytes  {len(compressed) / len(body):6.1%}  {elapsed:7.2f} ms")
+    if compression.brotli is None:
+        print("(brotli chưa cài → chỉ gzip)")
+
+
+if __name__ == "__main__":
+    main()
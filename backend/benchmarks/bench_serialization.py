@@ -0,0 +1,106 @@
+"""
+So sánh 2 đường serialize cho GET /flashcards/deck/{deck_id}:
+
+- orm : query ORM → validate List[schemas.Flashcard] (from_attributes) → json chuẩn
+        (đường FastAPI dùng khi route trả về ORM object + response_model)
+- fast: query cột (crud.get_flashcard_rows_by_deck) → FastJSONResponse (orjson)
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_serialization --cards 5000 --repeat 20
+DB SQLite tạm, không đụng flashcard.db.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.database import Base
+from app.utils import fast_json
+
+
+def seed(db, cards: int) -> int:
+    user = models.User(name="bench")
+    db.add(user)
+    db.flush()
+    deck = models.Deck(name="bench", language="JA", user_id=user.id)
+    db.add(deck)
+    db.flush()
+    db.execute(insert(models.Flashcard), [
+        {
+            "deck_id": deck.id,
+            "vietnamese": f"từ vựng số {i}",
+            "pronunciation": f"tango {i}",
+            "target_language": f"単語{i}",
+            "content_hash": f"{i:064d}",
+        }
+        for i in range(cards)
+    ])
+    db.commit()
+    return deck.id
+
+
+def orm_path(db, deck_id: int, adapter: TypeAdapter) -> bytes:
+    flashcards = crud.get_flashcards_by_deck(db, deck_id)
+    validated = adapter.validate_python(flashcards, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(db, deck_id: int) -> bytes:
+    return fast_json.dumps(crud.get_flashcard_rows_by_deck(db, deck_id))
+
+
+def measure(fn, session_factory, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        db = session_factory()  # session mới mỗi lần như 1 request
+        try:
+            start = time.perf_counter()
+            fn(db)
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            deck_id = seed(db, args.cards)
+
+        adapter = TypeAdapter(List[schemas.Flashcard])
+        paths = {
+            "orm": lambda db: orm_path(db, deck_id, adapter),
+            "fast": lambda db: fast_path(db, deck_id),
+        }
+        for fn in paths.values():  # warm-up
+            measure(fn, Session, 2)
+
+        print(f"{args.cards} flashcards, {args.repeat} lần, orjson={'yes' if fast_json.orjson else 'no'}")
+        results = {}
+        for name, fn in paths.items():
+            timings = measure(fn, Session, args.repeat)
+            results[name] = statistics.median(timings)
+            print(f"  {name:<5} median {results[name]:8.2f} ms   p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:8.2f} ms")
+        print(f"  speedup x{results['orm'] / results['fast']:.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Đo thời gian khởi động: chi phí import từng module (python -X importtime)
+và tổng thời gian import app.main, tách riêng bước migrate (startup).
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_startup --top 25 --repeat 5
+Mỗi lần đo là 1 process Python mới (cold import) trên DB SQLite tạm.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+TIMING_SCRIPT = """
+import time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.migrations import migrate
+migrate(app.main.engine)
+print(f"{(imported - start) * 1000:.1f} {(time.perf_counter() - imported) * 1000:.1f}")
+"""
+
+
+def _env(tmp: str) -> dict:
+    return {
+        **os.environ,
+        "APP_ENV": "dev",
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+        "PYTHONPATH": os.getcwd(),
+    }
+
+
+def import_costs(tmp: str):
+    """{module: (self_us, cumulative_us)} từ -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=_env(tmp), capture_output=True, text=True, check=True,
+    )
+    costs = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        costs[name.strip()] = (int(self_us), int(cumulative_us))
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="Số module nặng nhất cần in")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        costs = import_costs(tmp)
+
+        # Gộp theo package gốc (fastapi.*, sqlalchemy.*, app.routers.x ...) theo self time
+        packages = defaultdict(int)
+        for name, (self_us, _) in costs.items():
+            root = ".".join(name.split(".")[:3]) if name.startswith("app.") else name.split(".")[0]
+            packages[root] += self_us
+
+        print(f"Import app.main: {costs.get('app.main', (0, 0))[1] / 1000:.1f} ms cumulative")
+        print(f"\nTop {args.top} package (self time gộp):")
+        for name, total in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {total / 1000:9.1f} ms  {name}")
+
+        print("\nModule app.* (cumulative, gồm cả thư viện mà module kéo vào):")
+        for name, (_, cumulative) in sorted(costs.items(), key=lambda item: -item[1][1]):
+            if name.startswith("app."):
+                print(f"  {cumulative / 1000:9.1f} ms  {name}")
+
+        imports, migrations = [], []
+        for _ in range(args.repeat):
+            out = subprocess.run(
+                [sys.executable, "-c", TIMING_SCRIPT], env=_env(tmp), capture_output=True, text=True, check=True,
+            ).stdout.split()
+            imports.append(float(out[-2]))
+            migrations.append(float(out[-1]))
+        print(f"\nWall time ({args.repeat} lần, median): import {statistics.median(imports):.1f} ms, "
+              f"migrate {statistics.median(migrations):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
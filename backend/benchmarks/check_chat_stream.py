@@ -0,0 +1,167 @@
+"""
+Kiểm tra POST /api/chatgpt với server OpenAI-compatible giả chạy local (không gọi OpenAI thật):
+- "stream": false → JSON {"reply", "cached"}, lần gọi thứ 2 lấy từ cache
+- "stream": true  → text/event-stream, mỗi chunk 1 event data: {"delta": ...}, kết thúc bằng [DONE];
+  event đầu tiên phải tới client trước khi server giả gửi xong (response không bị buffer)
+
+App chạy trong uvicorn thật (lifespan off → không start scheduler) trên DB SQLite tạm.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.check_chat_stream --chunks 5 --chunk-delay 0.2
+Exit code 1 nếu có kiểm tra thất bại.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_fake_openai(chunks: list, chunk_delay: float):
+    """Handler trả lời /v1/chat/completions như OpenAI (JSON hoặc SSE từng chunk, cách nhau chunk_delay giây)"""
+
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            base = {"id": "chatcmpl-fake", "created": 0, "model": body.get("model", "fake")}
+
+            if not body.get("stream"):
+                payload = json.dumps({
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(chunks)},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": len(chunks), "total_tokens": 1 + len(chunks)},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            # HTTP/1.0, không Content-Length → client đọc tới khi đóng kết nối
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for text in chunks:
+                event = {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(chunk_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    return FakeOpenAIHandler
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}" + (f" ({detail})" if detail else ""))
+    return ok
+
+
+def run_checks(base_url: str, chunks: list, chunk_delay: float) -> int:
+    import httpx
+
+    failures = 0
+    expected = "".join(chunks)
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        print("stream=false:")
+        request = {"messages": [{"role": "user", "content": "Dịch 'xin chào' sang tiếng Anh"}]}
+        first = client.post("/api/chatgpt", json=request).json()
+        second = client.post("/api/chatgpt", json=request).json()
+        failures += not check("reply matches fake server", first.get("reply") == expected, repr(first.get("reply")))
+        failures += not check("first call not cached", first.get("cached") is False)
+        failures += not check("second call served from cache", second.get("cached") is True)
+
+        print("stream=true:")
+        request = {"messages": [{"role": "user", "content": "'Cảm ơn' tiếng Nhật là gì?"}], "stream": True}
+        deltas, first_event_at, done = [], None, False
+        start = time.perf_counter()
+        with client.stream("POST", "/api/chatgpt", json=request) as response:
+            content_type = response.headers.get("content-type", "")
+            for line in response.iter_lines():
+                if not line.startswith("data: "):
+                    continue
+                if first_event_at is None:
+                    first_event_at = time.perf_counter() - start
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    done = True
+                    break
+                deltas.append(json.loads(data)["delta"])
+        total = time.perf_counter() - start
+        upstream = chunk_delay * len(chunks)
+
+        failures += not check("content-type text/event-stream", content_type.startswith("text/event-stream"), content_type)
+        failures += not check("one event per upstream chunk", deltas == chunks, f"{len(deltas)}/{len(chunks)}")
+        failures += not check("ends with [DONE]", done)
+        failures += not check(
+            "first event before upstream finished",
+            first_event_at is not None and first_event_at < upstream / 2,
+            f"first {first_event_at or 0:.2f}s, total {total:.2f}s, upstream {upstream:.2f}s",
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5, help="số chunk server giả stream về")
+    parser.add_argument("--chunk-delay", type=float, default=0.2, help="giây giữa 2 chunk")
+    args = parser.parse_args()
+
+    chunks = [f"phần {i} " for i in range(max(2, args.chunks))]
+    fake = ThreadingHTTPServer(("127.0.0.1", _free_port()), make_fake_openai(chunks, args.chunk_delay))
+    fake.daemon_threads = True
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Phải set trước khi import app (engine / client OpenAI đọc env lúc import)
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'chat.db')}"
+        os.environ.setdefault("APP_ENV", "dev")
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{fake.server_address[1]}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+
+        import uvicorn
+
+        from app.main import app
+
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        try:
+            failures = run_checks(f"http://127.0.0.1:{port}", chunks, args.chunk_delay)
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+            fake.shutdown()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Load test so sánh chế độ DB sync (mặc định) với ASYNC_DB=true.
+
+Mỗi chế độ chạy 1 process uvicorn riêng trên cùng DB SQLite tạm đã seed sẵn,
+rồi bắn GET /api/flashcards/deck/{id} và /api/decks/user/{id} với N client đồng thời.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.load_async --concurrency 200 --duration 10
+    python -m benchmarks.load_async --database-url postgresql://...   # DB có sẵn, đã seed
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from benchmarks.bench_serialization import seed
+
+
+async def _wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline and server.poll() is None:
+            try:
+                if (await client.get(base_url + "/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+async def _run_load(base_url: str, paths, concurrency: int, duration: float):
+    latencies, errors = [], 0
+    stop_at = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker(index: int):
+            nonlocal errors
+            i = index
+            while time.monotonic() < stop_at:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[i % len(paths)])
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+                i += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def run_mode(name: str, env: dict, args, paths):
+    port = args.port
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(_wait_ready(base_url, server))
+        asyncio.run(_run_load(base_url, paths, 10, 1))  # warm-up
+        latencies, errors = asyncio.run(_run_load(base_url, paths, args.concurrency, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    print(
+        f"  {name:<6} {len(latencies) / args.duration:8.1f} req/s   "
+        f"p50 {statistics.median(latencies):7.1f} ms   "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:7.1f} ms   errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--database-url", help="Dùng DB có sẵn thay vì SQLite tạm (phải có user 1 / deck 1)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url
+        deck_id, user_id = 1, 1
+        if database_url is None:
+            database_url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+            engine = create_engine(database_url)
+            Base.metadata.create_all(bind=engine)
+            with sessionmaker(bind=engine)() as db:
+                deck_id = seed(db, args.cards)
+            engine.dispose()
+
+        paths = [f"/api/flashcards/deck/{deck_id}", f"/api/decks/user/{user_id}"]
+        print(f"{args.concurrency} client đồng thời, {args.duration:g}s, {database_url.split(':')[0]}")
+        base_env = {**os.environ, "DATABASE_URL": database_url, "APP_ENV": os.getenv("APP_ENV", "dev")}
+        run_mode("sync", {**base_env, "ASYNC_DB": "false"}, args, paths)
+        run_mode("async", {**base_env, "ASYNC_DB": "true"}, args, paths)
+
+
+if __name__ == "__main__":
+    main()
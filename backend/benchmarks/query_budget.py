@@ -0,0 +1,102 @@
+"""
+Kiểm tra số câu SQL tối đa (query budget) của các endpoint đọc chính bằng
+assert_max_queries: số query không được tăng theo số user / deck / flashcard (chặn N+1).
+
+Chạy từ thư mục backend:
+    python -m benchmarks.query_budget --users 20 --decks 5 --cards 50
+Exit code 1 nếu có endpoint vượt budget. DB SQLite tạm, không đụng flashcard.db.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# Budget = số query tối đa / request, không phụ thuộc kích thước dữ liệu
+QUERY_BUDGETS = {
+    "/api/users": 2,
+    "/api/users/{user_id}": 6,
+    "/api/decks/user/{user_id}": 2,
+    "/api/decks/{deck_id}": 3,
+    "/api/flashcards/deck/{deck_id}": 2,
+    "/api/sync/users/{user_id}/changes": 4,
+}
+
+
+def seed_many(db, users: int, decks: int, cards: int):
+    from sqlalchemy import insert
+
+    from app import models
+
+    first_user = first_deck = None
+    for u in range(users):
+        user = models.User(name=f"budget-{u}")
+        db.add(user)
+        db.flush()
+        for d in range(decks):
+            deck = models.Deck(name=f"deck-{d}", language="JA", user_id=user.id)
+            db.add(deck)
+            db.flush()
+            db.execute(insert(models.Flashcard), [
+                {
+                    "deck_id": deck.id,
+                    "vietnamese": f"từ {i}",
+                    "pronunciation": f"tango {i}",
+                    "target_language": f"単語{i}",
+                    "content_hash": f"{deck.id:032d}{i:032d}",
+                }
+                for i in range(cards)
+            ])
+            first_deck = first_deck or deck.id
+        first_user = first_user or user.id
+    db.commit()
+    return first_user, first_deck
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--decks", type=int, default=5, help="deck mỗi user")
+    parser.add_argument("--cards", type=int, default=50, help="flashcard mỗi deck")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Phải set trước khi import app (engine tạo lúc import)
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'budget.db')}"
+        os.environ.setdefault("APP_ENV", "dev")
+
+        from fastapi.testclient import TestClient
+
+        from app.database import SessionLocal, engine
+        from app.main import app
+        from app.migrations import migrate
+        from app.utils.query_profiler import assert_max_queries
+
+        # Không chạy startup (TestClient không dùng `with`) → scheduler không start,
+        # job nền không lẫn query vào số đếm (assert_max_queries đếm cả process)
+        migrate(engine)
+        db = SessionLocal()
+        try:
+            user_id, deck_id = seed_many(db, args.users, args.decks, args.cards)
+        finally:
+            db.close()
+
+        failures = 0
+        client = TestClient(app)
+        print(f"{'endpoint':<40} {'queries':>8} {'budget':>7}")
+        for route, budget in QUERY_BUDGETS.items():
+            path = route.format(user_id=user_id, deck_id=deck_id)
+            try:
+                with assert_max_queries(budget) as profile:
+                    response = client.get(path)
+                status = "ok" if response.status_code == 200 else f"HTTP {response.status_code}"
+            except AssertionError as e:
+                failures += 1
+                status = "OVER BUDGET"
+                print(e, file=sys.stderr)
+            print(f"{route:<40} {profile.count:>8} {budget:>7}  {status}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Sinh dữ liệu giả lập tái lập được (cùng --seed → cùng dữ liệu) cho benchmark:
+N user, mỗi user M deck (xoay vòng EN / ZH / JA / KO), mỗi deck K flashcard.
+
+Từ vựng ghép từ âm tiết của từng ngôn ngữ, pronunciation sinh bằng đúng
+generate_pronunciation của app (pinyin / romaji / romaja), không gọi mạng.
+
+Chạy từ thư mục backend (seed vào DB trống dành riêng cho benchmark):
+    python -m benchmarks.seed_data --database-url sqlite:///./bench.db --users 50 --decks 4 --cards 200
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from sqlalchemy import insert
+
+from app import models
+from app.services.pronunciation import generate_pronunciation
+from app.utils.content_hash import flashcard_content_hash
+
+LANGUAGES = ("EN", "ZH", "JA", "KO")
+
+SYLLABLES = {
+    "EN": ["ba", "con", "de", "fer", "gal", "hon", "in", "jor", "kel", "lum", "mar", "nor",
+           "pen", "qua", "ros", "sun", "ter", "ul", "ven", "win", "xen", "yor", "zel"],
+    "ZH": list("学生老师朋友家人天气吃饭喝水工作时间电话手机书本汉字中文今天明天"),
+    "JA": list("あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわ")
+          + list("日本語学生先生時間電車"),
+    "KO": list("가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주"),
+}
+VIETNAMESE_SYLLABLES = [
+    "học", "sinh", "giáo", "viên", "bạn", "bè", "gia", "đình", "thời", "tiết", "ăn", "cơm",
+    "uống", "nước", "công", "việc", "điện", "thoại", "sách", "vở", "chữ", "hôm", "nay", "mai",
+]
+
+
+def _word(rng: random.Random, syllables: List[str], low: int = 2, high: int = 4) -> str:
+    return "".join(rng.choice(syllables) for _ in range(rng.randint(low, high)))
+
+
+def make_flashcard_rows(rng: random.Random, language: str, count: int, start: int = 0) -> List[Dict[str, str]]:
+    """Dòng flashcard dạng CSV (vietnamese / pronunciation / target_language), không trùng nhau"""
+    rows = []
+    for i in range(start, start + count):
+        # Hậu tố số thứ tự → không trùng content_hash trong cùng deck
+        target = _word(rng, SYLLABLES[language]) + str(i)
+        vietnamese = " ".join(rng.choice(VIETNAMESE_SYLLABLES) for _ in range(rng.randint(1, 3))) + f" {i}"
+        rows.append({
+            "vietnamese": vietnamese,
+            "pronunciation": generate_pronunciation(target, language),
+            "target_language": target,
+        })
+    return rows
+
+
+def generate(db, users: int, decks: int, cards: int, seed: int = 42) -> Dict[str, list]:
+    """
+    Seed dữ liệu, trả về {"user_ids": [...], "decks": [(deck_id, language), ...]}.
+    Flashcard insert theo lô (executemany) nên seed vài trăm nghìn thẻ vẫn nhanh.
+    """
+    rng = random.Random(seed)
+    user_ids, deck_refs = [], []
+    for u in range(users):
+        user = models.User(name=f"bench-user-{u}")
+        db.add(user)
+        db.flush()
+        user_ids.append(user.id)
+        for d in range(decks):
+            language = LANGUAGES[(u + d) % len(LANGUAGES)]
+            deck = models.Deck(name=f"{language} deck {d}", language=language, user_id=user.id)
+            db.add(deck)
+            db.flush()
+            deck_refs.append((deck.id, language))
+            rows = make_flashcard_rows(rng, language, cards)
+            if rows:
+                db.execute(insert(models.Flashcard), [
+                    {
+                        **row,
+                        "deck_id": deck.id,
+                        "content_hash": flashcard_content_hash(row["vietnamese"], row["target_language"]),
+                    }
+                    for row in rows
+                ])
+        db.commit()
+    return {"user_ids": user_ids, "decks": deck_refs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--decks", type=int, default=4, help="deck mỗi user")
+    parser.add_argument("--cards", type=int, default=200, help="flashcard mỗi deck")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.migrations import migrate
+
+    engine = create_engine(args.database_url)
+    migrate(engine)
+    start = time.perf_counter()
+    with sessionmaker(bind=engine)() as db:
+        generate(db, args.users, args.decks, args.cards, args.seed)
+    engine.dispose()
+    total = args.users * args.decks * args.cards
+    print(f"Seeded {args.users} users, {args.users * args.decks} decks, {total} flashcards "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()